@@ -1,29 +1,541 @@
+import argparse
+import hashlib
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib.figure import Figure
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from leaderboard_io import (
+    LEADERBOARD_COLUMNS, WALLET_BYTES, iter_leaderboard_batches, iter_leaderboard_records,
+    read_header, read_leaderboard_columns, read_leaderboard_store, wallet_key
+)
+from quantile_sketch import REPORT_QUANTILES, SEGMENT_QUANTILES, load_sketches, rank_error
+from stage_profiler import finish_profiling, profiled, profiling_from_env
+
+POINT_COLUMNS = ['tradingPoints', 'stakingPoints', 'signalPoints', 'totalPoints']
+
+SEGMENT_LABELS = [
+    'Whale (Top 10%)',
+    'High Performer (75-90%)',
+    'Active User (50-75%)',
+    'Regular User (25-50%)',
+    'New User (Bottom 25%)'
+]
+# Share of users in each segment when the thresholds are exact quantiles
+SEGMENT_SHARES = [0.10, 0.15, 0.25, 0.25, 0.25]
+
+STRATEGY_LABELS = ['Trading Focused', 'Staking Focused', 'Signal Focused', 'Balanced', 'Mixed Strategy']
+
+# Log-spaced bins (~1.2% wide) used for approximate quantiles in chunked mode;
+# the first bin collects everything below 0.001 points and reads back as 0
+HISTOGRAM_EDGES = np.concatenate(([0.0], np.logspace(-3, 12, 3001)))
+
+
+def segment_codes(points, thresholds):
+    """``SEGMENT_LABELS`` index (int8) of each total given (p90, p75, p50, p25) thresholds"""
+    p90, p75, p50, p25 = thresholds
+    points = np.asarray(points, dtype=float)
+    conditions = [points >= p90, points >= p75, points >= p50, points >= p25]
+    return np.select(conditions, range(4), default=4).astype(np.int8)
+
+
+def categorize_users(points, thresholds):
+    """Map total points to segment labels given (p90, p75, p50, p25) thresholds"""
+    return np.asarray(SEGMENT_LABELS)[segment_codes(points, thresholds)]
+
+
+def columns_to_frame(columns):
+    """Wrap leaderboard column buffers (any subset) in a DataFrame without per-row objects"""
+    frame = {}
+    for name, typecode in LEADERBOARD_COLUMNS.items():
+        if name not in columns:
+            continue
+        if typecode == 'q':
+            frame[name] = np.frombuffer(columns[name], dtype=np.int64)
+        elif typecode == 'd':
+            frame[name] = np.frombuffer(columns[name], dtype=np.float64)
+        else:
+            frame[name] = columns[name]
+    return pd.DataFrame(frame)
+
+
+def format_bytes(n):
+    """Human readable byte count"""
+    for unit in ['B', 'KB', 'MB']:
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def process_rss():
+    """Current and peak resident set size of this process in bytes (None where unavailable)"""
+    current = peak = None
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == 'darwin' else 1024
+    return {'rss_bytes': current, 'peak_rss_bytes': peak}
+
+
+def point_ratios(df):
+    """Share of trading, staking and signal points in each user's total"""
+    return (
+        df['tradingPoints'] / df['totalPoints'],
+        df['stakingPoints'] / df['totalPoints'],
+        df['signalPoints'] / df['totalPoints']
+    )
+
+
+def strategy_codes(trading_ratio, staking_ratio, signal_ratio):
+    """``STRATEGY_LABELS`` index (int8) of each user's points split"""
+    trading_ratio = np.asarray(trading_ratio, dtype=float)
+    staking_ratio = np.asarray(staking_ratio, dtype=float)
+    signal_ratio = np.asarray(signal_ratio, dtype=float)
+    conditions = [
+        trading_ratio > 0.7,
+        staking_ratio > 0.7,
+        signal_ratio > 0.3,
+        (trading_ratio > 0.4) & (staking_ratio > 0.4)
+    ]
+    return np.select(conditions, range(4), default=4).astype(np.int8)
+
+
+def categorize_strategies(trading_ratio, staking_ratio, signal_ratio):
+    """Classify users by how their points are split across categories"""
+    return np.asarray(STRATEGY_LABELS)[strategy_codes(trading_ratio, staking_ratio, signal_ratio)]
+
+
+def _object_bytes(value):
+    """Deep size of one object-column cell as pandas counts it (pointer + object)"""
+    return 8 + sys.getsizeof(value)
+
+
+def derived_columns_bytes(n, compact):
+    """
+    Deep size of the columns the analyses add to an ``n``-row frame, from
+    dtypes alone: int8 category codes in the compact schema, float64 ratios
+    plus object label columns in the full-width one (segment labels weighted
+    by their quantile shares, strategy labels averaged).
+    """
+    if compact:
+        return 2 * n + sum(_object_bytes(label) for label in SEGMENT_LABELS + STRATEGY_LABELS)
+    segment = np.average([_object_bytes(label) for label in SEGMENT_LABELS], weights=SEGMENT_SHARES)
+    strategy = np.mean([_object_bytes(label) for label in STRATEGY_LABELS])
+    return int(n * (3 * 8 + segment + strategy))
+
+
+def full_width_bytes(n, odd_wallets=()):
+    """
+    Deep size of the default schema for ``n`` rows after analysis, from
+    dtypes and the row count: int64 rank, float64 points, one ``0x`` + 40-hex
+    string per packed wallet (``odd_wallets`` sized as they are) and the
+    derived columns. Nothing is built to measure it.
+    """
+    packed = n - len(odd_wallets)
+    wallets = packed * _object_bytes('0x' + '0' * 40) + sum(_object_bytes(w) for w in odd_wallets)
+    return 8 * n * (1 + len(POINT_COLUMNS)) + wallets + derived_columns_bytes(n, compact=False)
+
+
+def pack_wallets(wallets):
+    """
+    Wallet table for the compact schema: an ``(n, 20)`` uint8 array of packed
+    addresses plus ``{row: address}`` for the ones that do not pack
+    losslessly (see ``leaderboard_io.wallet_key``).
+    """
+    packed = bytearray(len(wallets) * WALLET_BYTES)
+    odd = {}
+    for i, wallet in enumerate(wallets):
+        key = wallet_key(wallet)
+        if isinstance(key, bytes):
+            packed[i * WALLET_BYTES:(i + 1) * WALLET_BYTES] = key
+        else:
+            odd[i] = key
+    return np.frombuffer(packed, dtype=np.uint8).reshape(-1, WALLET_BYTES), odd
+
+
+class PartialAggregates:
+    """Mergeable summary of a run of leaderboard rows (one chunk or many)"""
+
+    def __init__(self):
+        k = len(POINT_COLUMNS)
+        self.count = 0
+        self.sums = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros((k, k))
+        self.minimum = np.full(k, np.inf)
+        self.maximum = np.full(k, -np.inf)
+        self.histograms = np.zeros((k, len(HISTOGRAM_EDGES) - 1), dtype=np.int64)
+        self.strategies = {}
+
+    @classmethod
+    def from_chunk(cls, chunk):
+        """Summarize a single DataFrame chunk"""
+        agg = cls()
+        if len(chunk) == 0:
+            return agg
+        values = chunk[POINT_COLUMNS].to_numpy(dtype=float)
+        agg.count = len(values)
+        agg.sums = values.sum(axis=0)
+        agg.mean = values.mean(axis=0)
+        centered = values - agg.mean
+        agg.m2 = centered.T @ centered
+        agg.minimum = values.min(axis=0)
+        agg.maximum = values.max(axis=0)
+
+        n_bins = agg.histograms.shape[1]
+        for i in range(len(POINT_COLUMNS)):
+            bins = np.searchsorted(HISTOGRAM_EDGES, values[:, i], side='right') - 1
+            agg.histograms[i] = np.bincount(np.clip(bins, 0, n_bins - 1), minlength=n_bins)
+
+        strategies = categorize_strategies(*point_ratios(chunk))
+        for strategy in pd.unique(strategies):
+            mask = strategies == strategy
+            agg.strategies[strategy] = [int(mask.sum()), values[mask].sum(axis=0)]
+        return agg
+
+    def merge(self, other):
+        """Fold ``other`` (rows that follow this run) into this aggregate"""
+        if other.count == 0:
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 = self.m2 + other.m2 + np.outer(delta, delta) * self.count * other.count / n
+        self.mean = self.mean + delta * other.count / n
+        self.count = n
+        self.sums = self.sums + other.sums
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        self.histograms += other.histograms
+        for strategy, (count, sums) in other.strategies.items():
+            if strategy in self.strategies:
+                self.strategies[strategy][0] += count
+                self.strategies[strategy][1] = self.strategies[strategy][1] + sums
+            else:
+                self.strategies[strategy] = [count, sums]
+        return self
+
+    def quantile(self, column, q):
+        """Approximate quantile from the histogram (within one bin width)"""
+        i = POINT_COLUMNS.index(column)
+        counts = self.histograms[i]
+        if self.count == 0:
+            return float('nan')
+        target = q * (self.count - 1)
+        cumulative = np.cumsum(counts)
+        b = int(np.searchsorted(cumulative, target, side='right'))
+        if b == 0:
+            return float(max(self.minimum[i], 0.0))
+        before = cumulative[b - 1]
+        left, right = HISTOGRAM_EDGES[b], HISTOGRAM_EDGES[b + 1]
+        fraction = (target - before + 0.5) / counts[b]
+        value = left + (right - left) * min(fraction, 1.0)
+        return float(np.clip(value, self.minimum[i], self.maximum[i]))
+
+    def correlations(self):
+        """Pearson correlation matrix in ``DataFrame.corr().to_dict()`` layout"""
+        std = np.sqrt(np.diag(self.m2))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.m2 / np.outer(std, std)
+        return {
+            col: {row: float(corr[r, c]) for r, row in enumerate(POINT_COLUMNS)}
+            for c, col in enumerate(POINT_COLUMNS)
+        }
+
+
+# Fixed "top N" groups always present exactly in the concentration artifact
+TOP_GROUPS = [1, 10, 50, 100, 500, 1000, 5000, 10000]
+
+
+def lorenz_ranks(n, points=256):
+    """Ranks at which the downsampled Lorenz curve is recorded (1-based)"""
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    ranks = np.concatenate((
+        np.geomspace(1, n, points).round(),
+        np.linspace(1, n, points // 4).round(),
+        [g for g in TOP_GROUPS if g <= n]
+    ))
+    return np.unique(ranks.astype(np.int64))
+
+
+def histogram_gini(counts, values):
+    """Gini coefficient of a distribution given as ascending (value, count) bins"""
+    counts = np.asarray(counts, dtype=float)
+    values = np.asarray(values, dtype=float)
+    n = counts.sum()
+    total = (counts * values).sum()
+    if n == 0 or total == 0:
+        return 0.0
+    before = np.cumsum(counts) - counts
+    # Sum of position * value over tied users in each bin
+    weighted = (values * counts * (2 * before + counts + 1) / 2).sum()
+    return float(2 * weighted / (n * total) - (n + 1) / n)
+
+
+def histogram_top_share(counts, values, pct):
+    """Share of the total held by the top ``pct`` percent, from ascending (value, count) bins"""
+    counts = np.asarray(counts, dtype=float)[::-1]
+    values = np.asarray(values, dtype=float)[::-1]
+    n = counts.sum()
+    total = (counts * values).sum()
+    if n == 0 or total == 0:
+        return 0.0
+    top = max(np.ceil(n * pct / 100), 1)
+    # Users taken from each bin, highest bins first
+    taken = np.clip(top - (np.cumsum(counts) - counts), 0, counts)
+    return float((taken * values).sum() / total)
+
+
+class ConcentrationCurve:
+    """
+    Cumulative share of points held by the top-N users, built from total
+    points fed in descending order (whole array or successive chunks).
+    """
+
+    def __init__(self, n_users, points=256):
+        self.n_users = n_users
+        self.ranks = lorenz_ranks(n_users, points)
+        self.cumulative = np.zeros(len(self.ranks))
+        self.seen = 0
+        self.total = 0.0
+        self.rank_weighted = 0.0
+        self.ordered = True
+        self._last = np.inf
+
+    def update(self, points_desc):
+        """Consume the next run of points in descending order"""
+        points_desc = np.asarray(points_desc, dtype=float)
+        if len(points_desc) == 0:
+            return self
+        if points_desc[0] > self._last or np.any(np.diff(points_desc) > 0):
+            self.ordered = False
+        self._last = points_desc[-1]
+
+        start = self.seen
+        cumulative = self.total + np.cumsum(points_desc)
+        positions = np.arange(start + 1, start + len(points_desc) + 1)
+        in_chunk = (self.ranks > start) & (self.ranks <= start + len(points_desc))
+        self.cumulative[in_chunk] = cumulative[self.ranks[in_chunk] - start - 1]
+
+        self.rank_weighted += float((positions * points_desc).sum())
+        self.total = float(cumulative[-1])
+        self.seen += len(points_desc)
+        return self
+
+    def gini(self):
+        """Gini coefficient from the descending stream"""
+        n = self.seen
+        if n == 0 or self.total == 0:
+            return 0.0
+        return float((n + 1) / n - 2 * self.rank_weighted / (n * self.total))
+
+    def points_held_by_top(self, n):
+        """Points held by the top ``n`` users (interpolated between samples)"""
+        if n <= 0 or len(self.ranks) == 0:
+            return 0.0
+        return float(np.interp(min(n, self.n_users), np.concatenate(([0], self.ranks)),
+                               np.concatenate(([0.0], self.cumulative))))
+
+
+# Categories served by the top-K index
+TOP_K_CATEGORIES = {
+    'trading': 'tradingPoints',
+    'staking': 'stakingPoints',
+    'signal': 'signalPoints',
+    'total': 'totalPoints',
+}
+TOP_K_FIELDS = ['rank', 'walletAddress'] + POINT_COLUMNS
+# Rows per category in the exported index; smaller lookups are served from it
+TOP_K_SIZE = 1000
+
+
+def top_k_positions(values, k):
+    """Positions of the ``k`` largest values, descending, via partial selection"""
+    values = np.asarray(values, dtype=float)
+    if k <= 0 or len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(values):
+        cutoff = values[np.argpartition(-values, k - 1)[k - 1]]
+        # Rows tied at the cutoff are taken in file (rank) order
+        above = np.flatnonzero(values > cutoff)
+        tied = np.flatnonzero(values == cutoff)[:k - len(above)]
+        candidates = np.concatenate((above, tied))
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
+
+def apply_plot_style():
+    try:
+        plt.style.use('seaborn-v0_8')
+    except:
+        # Fallback if seaborn style not available
+        plt.style.use('default')
+
+
+def _draw_points_distribution(ax, data):
+    edges = np.asarray(data['edges'])
+    ax.hist(edges[:-1], bins=edges, weights=data['counts'], alpha=0.7, color='skyblue', edgecolor='black')
+    ax.set_title('Total Points Distribution')
+    ax.set_xlabel('Total Points')
+    ax.set_ylabel('Number of Users')
+    ax.set_yscale('log')
+
+
+def _draw_category_split(ax, data):
+    ax.pie(data['sums'], labels=data['labels'], autopct='%1.1f%%', startangle=90)
+    ax.set_title('Points Distribution by Category')
+
+
+def _draw_user_segmentation(ax, data):
+    ax.bar(data['labels'], data['counts'], color=['#FFD700', '#C0C0C0', '#CD7F32', 'lightblue', 'lightgray'])
+    ax.set_title('User Segmentation')
+    ax.set_ylabel('Number of Users')
+    ax.tick_params(axis='x', rotation=45)
+
+
+def _draw_trading_vs_staking(ax, data):
+    ax.scatter(data['trading'], data['staking'], alpha=0.6, s=20)
+    ax.set_title('Trading vs Staking Points')
+    ax.set_xlabel('Trading Points')
+    ax.set_ylabel('Staking Points')
+
+
+def _draw_strategy_distribution(ax, data):
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7'][:len(data['labels'])]
+    ax.bar(data['labels'], data['counts'], color=colors)
+    ax.set_title('Strategy Distribution')
+    ax.set_ylabel('Number of Users')
+    ax.tick_params(axis='x', rotation=45)
+
+
+def _draw_top_50(ax, data):
+    points = data['points']
+    ax.plot(range(1, len(points) + 1), points, marker='o', linewidth=2, markersize=4)
+    ax.set_title('Top 50 Users Points')
+    ax.set_xlabel('Rank')
+    ax.set_ylabel('Total Points')
+
+
+# Dashboard panels in grid order (row by row)
+PANEL_RENDERERS = {
+    'points_distribution': _draw_points_distribution,
+    'category_split': _draw_category_split,
+    'user_segmentation': _draw_user_segmentation,
+    'trading_vs_staking': _draw_trading_vs_staking,
+    'strategy_distribution': _draw_strategy_distribution,
+    'top_50': _draw_top_50,
+}
+
+
+def panel_cache_key(name, data, dpi):
+    """Hash of everything that determines a rendered panel image"""
+    payload = json.dumps({'panel': name, 'dpi': dpi, 'data': data}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_panel(name, data, path, dpi=150):
+    """Render one dashboard panel to its own file (runs in worker processes)"""
+    apply_plot_style()
+    fig = Figure(figsize=(6, 6))
+    PANEL_RENDERERS[name](fig.subplots(), data)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+
 class ReyaAnalytics:
-    def __init__(self, data_file='reya_complete_leaderboard.json'):
-        """Initialize analytics processor with leaderboard data"""
+    def __init__(self, data_file='reya_complete_leaderboard.json', chunk_size=None,
+                 compact=False, float32_points=False, sketch_file=None):
+        """
+        Initialize analytics processor with leaderboard data.
+
+        With ``chunk_size`` set the snapshot is never held in memory: every
+        analysis is computed from streamed chunks of that many rows.
+        With ``compact`` the in-memory frame uses a reduced schema (see
+        ``compact_schema``); ``float32_points`` additionally halves the
+        point columns at the cost of ~7 significant digits.
+        With ``sketch_file`` (written by the fetcher for the same snapshot)
+        segmentation thresholds and percentiles come from the quantile
+        sketches instead of full-column quantiles.
+        """
         self.data_file = data_file
+        self.chunk_size = chunk_size
+        self.compact = compact
+        self.float32_points = float32_points
         self.df = None
+        self.wallets = None
+        self.odd_wallets = {}
+        self.memory_report = None
+        self.aggregates = None
+        self._segment_counts = None
+        self._concentration = None
+        self._cumulative_points = None
+        self._top_k = None
+        self._top_k_size = 0
+        self.sketches = None
         self.load_data()
+        if self.compact and self.df is not None:
+            self.compact_schema()
+        if sketch_file:
+            self.load_sketches(sketch_file)
     
+    @profiled('load.sketches')
+    def load_sketches(self, sketch_file):
+        """Use quantile sketches from ``sketch_file`` if they match this snapshot"""
+        try:
+            sketches, meta = load_sketches(sketch_file)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Could not load sketches from {sketch_file}: {e}")
+            return False
+        if meta.get('snapshot_timestamp') != self._snapshot_timestamp():
+            print(f"⚠️  Sketches in {sketch_file} belong to another snapshot - ignored")
+            return False
+        self.sketches = sketches
+        self._segment_counts = None
+        print(f"✅ Loaded quantile sketches from {sketch_file} "
+              f"(rank error ≤ {meta.get('rank_error', 0):.1%})")
+        return True
+    
+    @profiled('load')
     def load_data(self):
         """Load and preprocess the leaderboard data"""
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if self.chunk_size:
+                self.aggregates = self._aggregate_chunks()
+                print(f"✅ Aggregated {self.aggregates.count} users from {self.data_file} "
+                      f"in chunks of {self.chunk_size:,}")
+                return
             
-            if 'leaderboard' in data and isinstance(data['leaderboard'], list):
-                self.df = pd.DataFrame(data['leaderboard'])
-                print(f"✅ Loaded {len(self.df)} users from {self.data_file}")
+            # Records are streamed straight into column buffers
+            if self.compact:
+                # Wallets are packed on the way in, so no string column is built
+                store = read_leaderboard_store(self.data_file)
+                self.df = columns_to_frame(store.columns)
+                self.wallets = np.frombuffer(store.wallets, dtype=np.uint8).reshape(-1, WALLET_BYTES)
+                self.odd_wallets = store.odd_wallets
             else:
-                raise ValueError("Invalid data format")
+                self.df = columns_to_frame(read_leaderboard_columns(self.data_file))
+            print(f"✅ Loaded {len(self.df)} users from {self.data_file}")
                 
         except FileNotFoundError:
             print(f"❌ File {self.data_file} not found. Creating sample data...")
@@ -32,8 +544,30 @@ class ReyaAnalytics:
             print(f"❌ Error loading data: {e}")
             self.create_sample_data()
     
+    def _iter_chunks(self):
+        """Stream the snapshot as DataFrames of ``chunk_size`` rows"""
+        for columns in iter_leaderboard_batches(self.data_file, self.chunk_size):
+            yield columns_to_frame(columns)
+    
+    def _aggregate_chunks(self):
+        """Single pass building mergeable aggregates over every chunk"""
+        aggregates = PartialAggregates()
+        for chunk in self._iter_chunks():
+            aggregates.merge(PartialAggregates.from_chunk(chunk))
+        return aggregates
+    
+    def _read_head(self, n):
+        """First ``n`` rows of the snapshot without reading the rest"""
+        records = iter_leaderboard_records(self.data_file)
+        try:
+            return pd.DataFrame(list(islice(records, n)))
+        finally:
+            records.close()
+    
     def create_sample_data(self):
         """Create sample data for testing"""
+        # Sample data is small and always kept in memory
+        self.chunk_size = None
         np.random.seed(42)
         n_users = 10000
         
@@ -57,8 +591,74 @@ class ReyaAnalytics:
         
         print(f"✅ Created sample dataset with {len(self.df)} users")
     
+    def memory_footprint(self, frame=None):
+        """Deep memory usage of ``frame`` (default: the in-memory frame) plus the wallet table"""
+        frame = self.df if frame is None else frame
+        footprint = int(frame.memory_usage(deep=True).sum())
+        if self.wallets is not None:
+            footprint += self.wallets.nbytes
+            footprint += sum(sys.getsizeof(wallet) for wallet in self.odd_wallets.values())
+        return footprint
+    
+    @profiled('load.compact_schema')
+    def compact_schema(self):
+        """
+        Shrink the in-memory frame: keep only the known columns, int32 ranks,
+        optional float32 points, and wallet addresses packed to 20 bytes in a
+        table referenced by an int32 ``wallet_id`` column. Wallets loaded from
+        a snapshot are already packed (see ``load_data``).
+        
+        The reported frame sizes are computed from dtypes and the row count
+        as both schemas end up after the analyses (derived columns included);
+        the process RSS is measured alongside.
+        """
+        if 'walletAddress' in self.df.columns:
+            self.wallets, self.odd_wallets = pack_wallets(self.df['walletAddress'].tolist())
+        n = len(self.df)
+        before = full_width_bytes(n, list(self.odd_wallets.values()))
+        
+        point_dtype = np.float32 if self.float32_points else np.float64
+        compact_df = pd.DataFrame({
+            'rank': self.df['rank'].to_numpy(dtype=np.int32),
+            'wallet_id': np.arange(n, dtype=np.int32)
+        })
+        for col in POINT_COLUMNS:
+            compact_df[col] = self.df[col].to_numpy(dtype=point_dtype)
+        self.df = compact_df
+        
+        after = self.memory_footprint() + derived_columns_bytes(n, compact=True)
+        self.memory_report = {
+            'before_bytes': before,
+            'after_bytes': after,
+            'reduction': before / after if after else None,
+            **process_rss()
+        }
+        print(f"🗜️  Compact schema: {format_bytes(before)} → {format_bytes(after)} "
+              f"({self.memory_report['reduction']:.1f}x smaller frame after analysis)")
+        return self.memory_report
+    
+    def wallet_addresses(self, wallet_ids):
+        """Decode wallet addresses from the packed table"""
+        return [
+            self.odd_wallets[i] if i in self.odd_wallets else '0x' + self.wallets[i].tobytes().hex()
+            for i in wallet_ids.tolist()
+        ]
+    
+    def _with_wallets(self, frame):
+        """Re-attach decoded wallet addresses to a (small) slice of the frame"""
+        if 'walletAddress' in frame.columns:
+            return frame
+        frame = frame.copy()
+        frame.insert(1, 'walletAddress', self.wallet_addresses(frame['wallet_id'].to_numpy()))
+        return frame
+    
+    @profiled('analytics.basic_stats')
     def basic_stats(self):
         """Generate basic statistics"""
+        if self.chunk_size:
+            return self._chunked_basic_stats()
+        
+        top_user = self._with_wallets(self.df.head(1))
         stats = {
             'total_users': len(self.df),
             'total_points': {
@@ -80,58 +680,76 @@ class ReyaAnalytics:
                 'total': self.df['totalPoints'].median()
             },
             'top_user': {
-                'wallet': self.df.iloc[0]['walletAddress'],
-                'points': self.df.iloc[0]['totalPoints']
+                'wallet': top_user.iloc[0]['walletAddress'],
+                'points': top_user.iloc[0]['totalPoints']
             }
         }
         return stats
     
+    @profiled('analytics.user_segmentation')
     def user_segmentation(self):
         """Segment users into categories"""
-        # Define percentiles for segmentation
-        p90 = self.df['totalPoints'].quantile(0.9)
-        p75 = self.df['totalPoints'].quantile(0.75)
-        p50 = self.df['totalPoints'].quantile(0.5)
-        p25 = self.df['totalPoints'].quantile(0.25)
-        
-        def categorize_user(points):
-            if points >= p90:
-                return 'Whale (Top 10%)'
-            elif points >= p75:
-                return 'High Performer (75-90%)'
-            elif points >= p50:
-                return 'Active User (50-75%)'
-            elif points >= p25:
-                return 'Regular User (25-50%)'
-            else:
-                return 'New User (Bottom 25%)'
+        if self.chunk_size:
+            return self._chunked_user_segmentation()
         
-        self.df['user_category'] = self.df['totalPoints'].apply(categorize_user)
+        if self.compact:
+            # Codes straight from the thresholds; no per-row label strings
+            codes = segment_codes(self.df['totalPoints'], self.segment_thresholds())
+            self.df['user_category'] = pd.Categorical.from_codes(codes, categories=SEGMENT_LABELS)
+        else:
+            self.df['user_category'] = categorize_users(self.df['totalPoints'], self.segment_thresholds())
         
         segmentation = self.df['user_category'].value_counts()
-        return segmentation.to_dict()
+        return segmentation[segmentation > 0].to_dict()
+    
+    def segment_thresholds(self):
+        """totalPoints p90/p75/p50/p25: from sketches, histograms (chunked) or exact"""
+        if self.sketches is not None:
+            return self.sketches.segment_thresholds()
+        if self.chunk_size:
+            return [self.aggregates.quantile('totalPoints', q) for q in SEGMENT_QUANTILES]
+        return self.df['totalPoints'].quantile(list(SEGMENT_QUANTILES)).to_numpy()
     
+    @profiled('analytics.percentile_report')
+    def percentile_report(self, quantiles=REPORT_QUANTILES):
+        """Per-category percentiles and the source (and error) they come from"""
+        if self.sketches is not None:
+            k = self.sketches['totalPoints'].k
+            return {
+                'source': 'sketch',
+                'rank_error': rank_error(k),
+                'values': self.sketches.percentiles(quantiles)
+            }
+        names = [f"p{q * 100:g}" for q in quantiles]
+        if self.chunk_size:
+            values = {
+                col: {name: self.aggregates.quantile(col, q) for name, q in zip(names, quantiles)}
+                for col in POINT_COLUMNS
+            }
+            return {'source': 'histogram', 'rank_error': None, 'values': values}
+        table = self.df[POINT_COLUMNS].quantile(list(quantiles))
+        values = {
+            col: {name: float(table[col].iloc[i]) for i, name in enumerate(names)}
+            for col in POINT_COLUMNS
+        }
+        return {'source': 'exact', 'rank_error': 0.0, 'values': values}
+    
+    @profiled('analytics.strategy_analysis')
     def strategy_analysis(self):
         """Analyze user strategies based on point distribution"""
-        # Calculate point ratios
-        self.df['trading_ratio'] = self.df['tradingPoints'] / self.df['totalPoints']
-        self.df['staking_ratio'] = self.df['stakingPoints'] / self.df['totalPoints']
-        self.df['signal_ratio'] = self.df['signalPoints'] / self.df['totalPoints']
-        
-        # Define strategy categories
-        def categorize_strategy(row):
-            if row['trading_ratio'] > 0.7:
-                return 'Trading Focused'
-            elif row['staking_ratio'] > 0.7:
-                return 'Staking Focused'
-            elif row['signal_ratio'] > 0.3:
-                return 'Signal Focused'
-            elif row['trading_ratio'] > 0.4 and row['staking_ratio'] > 0.4:
-                return 'Balanced'
-            else:
-                return 'Mixed Strategy'
+        if self.chunk_size:
+            return self._chunked_strategy_analysis()
         
-        self.df['strategy'] = self.df.apply(categorize_strategy, axis=1)
+        # Calculate point ratios (kept transient in compact mode)
+        trading_ratio, staking_ratio, signal_ratio = point_ratios(self.df)
+        if self.compact:
+            codes = strategy_codes(trading_ratio, staking_ratio, signal_ratio)
+            self.df['strategy'] = pd.Categorical.from_codes(codes, categories=STRATEGY_LABELS)
+        else:
+            self.df['trading_ratio'] = trading_ratio
+            self.df['staking_ratio'] = staking_ratio
+            self.df['signal_ratio'] = signal_ratio
+            self.df['strategy'] = categorize_strategies(trading_ratio, staking_ratio, signal_ratio)
         
         strategy_stats = {}
         for strategy in self.df['strategy'].unique():
@@ -146,15 +764,23 @@ class ReyaAnalytics:
         
         return strategy_stats
     
+    @profiled('analytics.top_performers')
     def top_performers_analysis(self, top_n=100):
         """Analyze top performers"""
-        top_users = self.df.head(top_n)
+        if self.chunk_size:
+            top_users = self._read_head(top_n)
+            top_users['strategy'] = categorize_strategies(*point_ratios(top_users))
+        else:
+            top_users = self._with_wallets(self.df.head(top_n))
+        
+        def leaders(col):
+            return top_users.iloc[top_k_positions(top_users[col], 10)][['walletAddress', col, 'totalPoints']].to_dict('records')
         
         analysis = {
-            'top_traders': top_users.nlargest(10, 'tradingPoints')[['walletAddress', 'tradingPoints', 'totalPoints']].to_dict('records'),
-            'top_stakers': top_users.nlargest(10, 'stakingPoints')[['walletAddress', 'stakingPoints', 'totalPoints']].to_dict('records'),
-            'top_signalers': top_users.nlargest(10, 'signalPoints')[['walletAddress', 'signalPoints', 'totalPoints']].to_dict('records'),
-            'strategy_distribution': top_users['strategy'].value_counts().to_dict(),
+            'top_traders': leaders('tradingPoints'),
+            'top_stakers': leaders('stakingPoints'),
+            'top_signalers': leaders('signalPoints'),
+            'strategy_distribution': {k: v for k, v in top_users['strategy'].value_counts().items() if v > 0},
             'average_points': {
                 'trading': top_users['tradingPoints'].mean(),
                 'staking': top_users['stakingPoints'].mean(),
@@ -165,11 +791,58 @@ class ReyaAnalytics:
         
         return analysis
     
+    @profiled('analytics.correlations')
     def correlation_analysis(self):
         """Analyze correlations between different point types"""
+        if self.chunk_size:
+            return self.aggregates.correlations()
+        
         correlations = self.df[['tradingPoints', 'stakingPoints', 'signalPoints', 'totalPoints']].corr()
         return correlations.to_dict()
     
+    def _chunked_basic_stats(self):
+        """``basic_stats`` from streamed aggregates (medians are approximate)"""
+        agg = self.aggregates
+        names = ['trading', 'staking', 'signal', 'total']
+        top_user = self._read_head(1)
+        return {
+            'total_users': agg.count,
+            'total_points': {name: float(agg.sums[i]) for i, name in enumerate(names)},
+            'average_points': {name: float(agg.mean[i]) for i, name in enumerate(names)},
+            'median_points': {name: agg.quantile(col, 0.5) for name, col in zip(names, POINT_COLUMNS)},
+            'top_user': {
+                'wallet': top_user.iloc[0]['walletAddress'] if len(top_user) else None,
+                'points': top_user.iloc[0]['totalPoints'] if len(top_user) else None
+            }
+        }
+    
+    def _chunked_user_segmentation(self):
+        """Second streamed pass counting users against approximate thresholds"""
+        if self._segment_counts is None:
+            thresholds = self.segment_thresholds()
+            counts = {}
+            for chunk in self._iter_chunks():
+                labels, label_counts = np.unique(categorize_users(chunk['totalPoints'], thresholds),
+                                                 return_counts=True)
+                for label, count in zip(labels, label_counts):
+                    counts[str(label)] = counts.get(str(label), 0) + int(count)
+            self._segment_counts = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+        return dict(self._segment_counts)
+    
+    def _chunked_strategy_analysis(self):
+        """``strategy_analysis`` from the per-strategy partial sums"""
+        strategy_stats = {}
+        for strategy, (count, sums) in self.aggregates.strategies.items():
+            strategy_stats[strategy] = {
+                'count': count,
+                'avg_total_points': float(sums[3] / count),
+                'avg_trading_points': float(sums[0] / count),
+                'avg_staking_points': float(sums[1] / count),
+                'avg_signal_points': float(sums[2] / count)
+            }
+        return strategy_stats
+    
+    @profiled('analytics.insights')
     def generate_insights(self):
         """Generate key insights from the data"""
         insights = []
@@ -192,6 +865,10 @@ class ReyaAnalytics:
         whale_count = segmentation.get('Whale (Top 10%)', 0)
         insights.append(f"🐋 Whales (top 10%): {whale_count:,} users")
         
+        # Concentration
+        concentration = self.concentration_analysis()
+        insights.append(f"⚖️  Top 1% hold {concentration['top_pct_shares']['1'] * 100:.1f}% of points (Gini {concentration['gini']:.3f})")
+        
         # Strategy analysis
         strategy_stats = self.strategy_analysis()
         most_common_strategy = max(strategy_stats.keys(), key=lambda x: strategy_stats[x]['count'])
@@ -204,6 +881,187 @@ class ReyaAnalytics:
         
         return insights
     
+    def _concentration_curve(self):
+        """Sort total points once and build the cumulative-share structures"""
+        if self._concentration is None:
+            if self.chunk_size:
+                curve = ConcentrationCurve(self.aggregates.count)
+                for chunk in self._iter_chunks():
+                    curve.update(chunk['totalPoints'].to_numpy(dtype=float))
+                if not curve.ordered:
+                    print("⚠️  Snapshot is not in points order - concentration curve is approximate")
+            else:
+                points_desc = np.sort(self.df['totalPoints'].to_numpy(dtype=float))[::-1]
+                self._cumulative_points = np.cumsum(points_desc)
+                curve = ConcentrationCurve(len(points_desc)).update(points_desc)
+            self._concentration = curve
+        return self._concentration
+    
+    def top_share(self, n=None, pct=None):
+        """
+        Share of all points held by the top ``n`` users or the top ``pct``
+        percent of users. Exact O(1) lookup in memory, interpolated from the
+        downsampled curve in chunked mode.
+        """
+        curve = self._concentration_curve()
+        if pct is not None:
+            n = int(np.ceil(curve.n_users * pct / 100))
+        if not curve.total or not n:
+            return 0.0
+        n = min(n, curve.n_users)
+        if self._cumulative_points is not None:
+            return float(self._cumulative_points[n - 1] / curve.total)
+        return curve.points_held_by_top(n) / curve.total
+    
+    @profiled('analytics.concentration')
+    def concentration_analysis(self):
+        """Gini coefficients and top-share concentration overall and per category"""
+        curve = self._concentration_curve()
+        names = ['trading', 'staking', 'signal']
+        categories = {}
+        for name, col in zip(names, POINT_COLUMNS[:3]):
+            if self.chunk_size:
+                # Approximate: bin centers stand in for the users in each bin
+                i = POINT_COLUMNS.index(col)
+                counts = self.aggregates.histograms[i]
+                centers = np.concatenate(([0.0], np.sqrt(HISTOGRAM_EDGES[1:-1] * HISTOGRAM_EDGES[2:])))
+                categories[name] = {
+                    'gini': histogram_gini(counts, centers),
+                    'top_1pct_share': histogram_top_share(counts, centers, 1),
+                    'top_10pct_share': histogram_top_share(counts, centers, 10)
+                }
+            else:
+                values = np.sort(self.df[col].to_numpy(dtype=float))
+                n = len(values)
+                cumulative_desc = np.cumsum(values[::-1])
+                total = cumulative_desc[-1] if n else 0.0
+                categories[name] = {
+                    'gini': histogram_gini(np.ones(n), values),
+                    'top_1pct_share': float(cumulative_desc[max(int(np.ceil(n * 0.01)), 1) - 1] / total) if total else 0.0,
+                    'top_10pct_share': float(cumulative_desc[max(int(np.ceil(n * 0.1)), 1) - 1] / total) if total else 0.0
+                }
+        return {
+            'gini': curve.gini(),
+            'top_shares': {str(g): self.top_share(g) for g in TOP_GROUPS if g <= curve.n_users},
+            'top_pct_shares': {str(p): self.top_share(pct=p) for p in (1, 5, 10, 25, 50)},
+            'categories': categories
+        }
+    
+    @profiled('analytics.top_k_index')
+    def build_top_k_index(self, k=TOP_K_SIZE, cache_file='reya_topk_index.json'):
+        """
+        Top-``k`` rows for every point category, found by partial selection
+        (streamed chunk by chunk in chunked mode). Reuses ``cache_file`` when
+        it was built from the same snapshot with at least ``k`` rows.
+        """
+        if self._top_k is not None and self._top_k_size >= k:
+            return self._top_k
+        
+        timestamp = self._snapshot_timestamp()
+        if timestamp and cache_file and Path(cache_file).exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get('snapshot_timestamp') == timestamp and cached.get('k', 0) >= k:
+                    rows = pd.DataFrame(cached['rows'], columns=TOP_K_FIELDS)
+                    self._top_k = {
+                        name: rows.iloc[positions].reset_index(drop=True)
+                        for name, positions in cached['categories'].items()
+                    }
+                    self._top_k_size = cached['k']
+                    return self._top_k
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        if self.chunk_size:
+            index = {name: None for name in TOP_K_CATEGORIES}
+            for chunk in self._iter_chunks():
+                for name, col in TOP_K_CATEGORIES.items():
+                    candidates = chunk.iloc[top_k_positions(chunk[col], k)]
+                    if index[name] is not None:
+                        candidates = pd.concat([index[name], candidates], ignore_index=True)
+                    index[name] = candidates.iloc[top_k_positions(candidates[col], k)].reset_index(drop=True)
+            self._top_k = {
+                name: frame[TOP_K_FIELDS] if frame is not None else pd.DataFrame(columns=TOP_K_FIELDS)
+                for name, frame in index.items()
+            }
+        else:
+            self._top_k = {
+                name: self._with_wallets(self.df.iloc[top_k_positions(self.df[col], k)])[TOP_K_FIELDS].reset_index(drop=True)
+                for name, col in TOP_K_CATEGORIES.items()
+            }
+        self._top_k_size = k
+        return self._top_k
+    
+    def top_k(self, category='total', k=100):
+        """
+        Top ``k`` users by ``category`` (trading, staking, signal or total).
+        The index is built at least ``TOP_K_SIZE`` deep, so the export reuses it.
+        """
+        return self.build_top_k_index(max(k, self._top_k_size, TOP_K_SIZE))[category].head(k)
+    
+    @profiled('export.top_k_index')
+    def export_top_k_index(self, filename='reya_topk_index.json', k=TOP_K_SIZE):
+        """Export the per-category top-K index, sharing rows across categories"""
+        index = self.build_top_k_index(k, cache_file=filename)
+        rows = []
+        positions = {}
+        categories = {}
+        for name, frame in index.items():
+            refs = []
+            for record in frame.head(k).to_dict('records'):
+                wallet = record['walletAddress']
+                if wallet not in positions:
+                    positions[wallet] = len(rows)
+                    rows.append([record[field] for field in TOP_K_FIELDS])
+                refs.append(positions[wallet])
+            categories[name] = refs
+        
+        artifact = {
+            'generated_at': datetime.now().isoformat(),
+            'data_source': self.data_file,
+            'snapshot_timestamp': self._snapshot_timestamp(),
+            'k': k,
+            'fields': TOP_K_FIELDS,
+            'rows': rows,
+            'categories': categories
+        }
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False, default=float)
+        
+        print(f"✅ Top-{k} index exported to {filename} ({len(rows)} unique wallets)")
+        return artifact
+    
+    def _snapshot_timestamp(self):
+        """Timestamp from the snapshot header, if the data came from a file"""
+        try:
+            return read_header(self.data_file, keys=['timestamp']).get('timestamp')
+        except (OSError, ValueError):
+            return None
+    
+    @profiled('export.concentration')
+    def export_concentration(self, filename='reya_concentration.json'):
+        """Export the downsampled Lorenz curve for the report and dashboard"""
+        curve = self._concentration_curve()
+        artifact = {
+            'generated_at': datetime.now().isoformat(),
+            'data_source': self.data_file,
+            'snapshot_timestamp': self._snapshot_timestamp(),
+            'total_users': curve.n_users,
+            'total_points': curve.total,
+            **self.concentration_analysis(),
+            'curve': {
+                'ranks': curve.ranks.tolist(),
+                'cumulative_points': curve.cumulative.tolist()
+            }
+        }
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False)
+        
+        print(f"✅ Concentration curve exported to {filename} ({len(curve.ranks)} points)")
+        return artifact
+    
+    @profiled('export.summary_report')
     def export_summary_report(self, filename='reya_analytics_report.json'):
         """Export comprehensive analytics report"""
         report = {
@@ -214,8 +1072,16 @@ class ReyaAnalytics:
             'strategy_analysis': self.strategy_analysis(),
             'top_performers': self.top_performers_analysis(),
             'correlations': self.correlation_analysis(),
+            'percentiles': self.percentile_report(),
+            'concentration': self.concentration_analysis(),
+            'category_leaders': {
+                name: self.top_k(name, 10).to_dict('records') for name in TOP_K_CATEGORIES
+            },
             'key_insights': self.generate_insights()
         }
+        if self.memory_report:
+            report['memory_footprint'] = self.memory_report
+        report['process_memory'] = process_rss()
         
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2, ensure_ascii=False, default=str)
@@ -223,63 +1089,70 @@ class ReyaAnalytics:
         print(f"✅ Analytics report exported to {filename}")
         return report
     
+    def _chunked_points_histogram(self, bins=50):
+        """Re-bin the fine log histogram onto ``bins`` linear bins"""
+        agg = self.aggregates
+        i = POINT_COLUMNS.index('totalPoints')
+        centers = np.sqrt(HISTOGRAM_EDGES[:-1] * HISTOGRAM_EDGES[1:])
+        centers = np.clip(centers, agg.minimum[i], agg.maximum[i])
+        return np.histogram(centers, bins=np.linspace(agg.minimum[i], agg.maximum[i], bins + 1),
+                            weights=agg.histograms[i])
+    
+    def _chunked_sample(self, n, random_state=42):
+        """Approximately ``n`` rows drawn evenly from every chunk"""
+        fraction = min(1.0, n / max(self.aggregates.count, 1))
+        samples = [chunk.sample(frac=fraction, random_state=random_state) for chunk in self._iter_chunks()]
+        return pd.concat(samples) if samples else pd.DataFrame(columns=POINT_COLUMNS)
+    
+    @profiled('render.panel_data')
+    def panel_data(self):
+        """Small pre-binned inputs for every dashboard panel"""
+        if self.chunk_size:
+            counts, edges = self._chunked_points_histogram()
+            sample = self._chunked_sample(1000)
+            top_50 = self._read_head(50)['totalPoints']
+            point_sums = self.aggregates.sums[:3]
+        else:
+            counts, edges = np.histogram(self.df['totalPoints'], bins=50)
+            # Fixed seed keeps the panel (and its cache key) stable between runs
+            sample = self.df.sample(min(1000, len(self.df)), random_state=42)
+            top_50 = self.df['totalPoints'].head(50)
+            point_sums = [self.df[col].sum() for col in POINT_COLUMNS[:3]]
+        
+        segmentation = self.user_segmentation()
+        strategy_stats = self.strategy_analysis()
+        return {
+            'points_distribution': {'counts': counts.tolist(), 'edges': edges.tolist()},
+            'category_split': {
+                'labels': ['Trading', 'Staking', 'Signal'],
+                'sums': [float(x) for x in point_sums]
+            },
+            'user_segmentation': {
+                'labels': list(segmentation.keys()),
+                'counts': [int(x) for x in segmentation.values()]
+            },
+            'trading_vs_staking': {
+                'trading': sample['tradingPoints'].astype(float).tolist(),
+                'staking': sample['stakingPoints'].astype(float).tolist()
+            },
+            'strategy_distribution': {
+                'labels': list(strategy_stats.keys()),
+                'counts': [int(stats['count']) for stats in strategy_stats.values()]
+            },
+            'top_50': {'points': top_50.astype(float).tolist()}
+        }
+    
+    @profiled('render.dashboard')
     def create_visualizations(self):
         """Create visualization plots"""
-        try:
-            plt.style.use('seaborn-v0_8')
-        except:
-            # Fallback if seaborn style not available
-            plt.style.use('default')
+        apply_plot_style()
+        panels = self.panel_data()
         
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
         fig.suptitle('Reya Chain Points Analytics Dashboard', fontsize=16, fontweight='bold')
         
-        # 1. Points distribution histogram
-        axes[0, 0].hist(self.df['totalPoints'], bins=50, alpha=0.7, color='skyblue', edgecolor='black')
-        axes[0, 0].set_title('Total Points Distribution')
-        axes[0, 0].set_xlabel('Total Points')
-        axes[0, 0].set_ylabel('Number of Users')
-        axes[0, 0].set_yscale('log')
-        
-        # 2. Points by category pie chart
-        point_sums = [
-            self.df['tradingPoints'].sum(),
-            self.df['stakingPoints'].sum(),
-            self.df['signalPoints'].sum()
-        ]
-        axes[0, 1].pie(point_sums, labels=['Trading', 'Staking', 'Signal'], autopct='%1.1f%%', startangle=90)
-        axes[0, 1].set_title('Points Distribution by Category')
-        
-        # 3. User segmentation
-        segmentation = self.user_segmentation()
-        axes[0, 2].bar(segmentation.keys(), segmentation.values(), color=['#FFD700', '#C0C0C0', '#CD7F32', 'lightblue', 'lightgray'])
-        axes[0, 2].set_title('User Segmentation')
-        axes[0, 2].set_ylabel('Number of Users')
-        axes[0, 2].tick_params(axis='x', rotation=45)
-        
-        # 4. Trading vs Staking scatter plot
-        sample_df = self.df.sample(min(1000, len(self.df)))  # Sample for performance
-        axes[1, 0].scatter(sample_df['tradingPoints'], sample_df['stakingPoints'], alpha=0.6, s=20)
-        axes[1, 0].set_title('Trading vs Staking Points')
-        axes[1, 0].set_xlabel('Trading Points')
-        axes[1, 0].set_ylabel('Staking Points')
-        
-        # 5. Strategy distribution
-        strategy_stats = self.strategy_analysis()
-        strategies = list(strategy_stats.keys())
-        counts = [strategy_stats[s]['count'] for s in strategies]
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7'][:len(strategies)]
-        axes[1, 1].bar(strategies, counts, color=colors)
-        axes[1, 1].set_title('Strategy Distribution')
-        axes[1, 1].set_ylabel('Number of Users')
-        axes[1, 1].tick_params(axis='x', rotation=45)
-        
-        # 6. Top 50 users
-        top_50 = self.df.head(50)
-        axes[1, 2].plot(range(1, 51), top_50['totalPoints'], marker='o', linewidth=2, markersize=4)
-        axes[1, 2].set_title('Top 50 Users Points')
-        axes[1, 2].set_xlabel('Rank')
-        axes[1, 2].set_ylabel('Total Points')
+        for ax, (name, draw) in zip(axes.flat, PANEL_RENDERERS.items()):
+            draw(ax, panels[name])
         
         plt.tight_layout()
         
@@ -294,34 +1167,117 @@ class ReyaAnalytics:
         except Exception as e:
             print(f"⚠️  Could not display plots: {e}")
             print("   This is normal when running without a display (e.g., in some terminals)")
+    
+    @profiled('render.panels')
+    def create_panel_visualizations(self, output_dir='reya_panels', dpi=150, workers=None):
+        """
+        Render each dashboard panel to its own PNG in parallel worker processes.
+
+        Panels are cached by a hash of their pre-binned input; a panel whose
+        inputs are unchanged since the last run is not re-rendered.
+        """
+        panels = self.panel_data()
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+        
+        manifest_path = output / 'manifest.json'
+        manifest = {}
+        if manifest_path.exists():
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            except ValueError:
+                manifest = {}
+        
+        files = {}
+        stale = []
+        for name, data in panels.items():
+            path = output / f'{name}.png'
+            key = panel_cache_key(name, data, dpi)
+            files[name] = str(path)
+            if manifest.get(name) == key and path.exists():
+                continue
+            stale.append((name, data, str(path), dpi, key))
+        
+        if len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(render_panel, *zip(*[task[:4] for task in stale])))
+        elif stale:
+            render_panel(*stale[0][:4])
+        
+        for name, _, _, _, key in stale:
+            manifest[name] = key
+        manifest_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        
+        print(f"✅ Panels in '{output_dir}': {len(stale)} rendered, {len(panels) - len(stale)} unchanged")
+        return files
 
-def main():
+def main(argv=None):
     """Main function to run analytics"""
-    print("🚀 Starting Reya Chain Points Analytics...")
+    parser = argparse.ArgumentParser(description='Reya Chain Points Analytics')
+    parser.add_argument('--data-file', default='reya_complete_leaderboard.json',
+                        help='Leaderboard snapshot to analyze')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Stream the snapshot in chunks of N rows instead of loading it into memory')
+    parser.add_argument('--compact', action='store_true',
+                        help='Use the memory-compact DataFrame schema')
+    parser.add_argument('--float32', action='store_true',
+                        help='With --compact, store point columns as float32')
+    parser.add_argument('--panels', metavar='DIR', default=None,
+                        help='Render cached per-panel PNGs into DIR instead of the combined dashboard')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for --panels rendering')
+    parser.add_argument('--sketches', metavar='FILE', default=None,
+                        help='Take segmentation thresholds and percentiles from the fetcher\'s '
+                             'quantile sketches (e.g. reya_sketches.json)')
+    parser.add_argument('--dashboard-artifacts', action='store_true',
+                        help='Only export the files the dashboard reads '
+                             '(reya_concentration.json, reya_topk_index.json)')
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='reya_profile.json', default=None,
+                        help='Write a per-stage timing/cProfile/tracemalloc report '
+                             '(default reya_profile.json; or set REYA_PROFILE)')
+    args = parser.parse_args(argv)
     
-    # Initialize analytics
-    analytics = ReyaAnalytics()
-    
-    # Generate insights
-    print("\n📈 Key Insights:")
-    insights = analytics.generate_insights()
-    for insight in insights:
-        print(f"  {insight}")
-    
-    # Export comprehensive report
-    print("\n📊 Generating comprehensive report...")
-    report = analytics.export_summary_report()
-    
-    # Create visualizations (optional - requires matplotlib)
+    profiling_from_env(args.profile)
     try:
-        print("\n📈 Creating visualizations...")
-        analytics.create_visualizations()
-    except ImportError:
-        print("⚠️  Matplotlib not available. Skipping visualizations.")
-        print("   Install with: pip install matplotlib seaborn")
-    
-    print("\n✅ Analytics complete!")
-    return analytics
+        print("🚀 Starting Reya Chain Points Analytics...")
+        
+        # Initialize analytics
+        analytics = ReyaAnalytics(args.data_file, chunk_size=args.chunk_size,
+                                  compact=args.compact, float32_points=args.float32,
+                                  sketch_file=args.sketches)
+        
+        if args.dashboard_artifacts:
+            analytics.export_concentration()
+            analytics.export_top_k_index()
+            return analytics
+        
+        # Generate insights
+        print("\n📈 Key Insights:")
+        insights = analytics.generate_insights()
+        for insight in insights:
+            print(f"  {insight}")
+        
+        # Export comprehensive report
+        print("\n📊 Generating comprehensive report...")
+        report = analytics.export_summary_report()
+        analytics.export_concentration()
+        analytics.export_top_k_index()
+        
+        # Create visualizations (optional - requires matplotlib)
+        try:
+            print("\n📈 Creating visualizations...")
+            if args.panels:
+                analytics.create_panel_visualizations(args.panels, workers=args.workers)
+            else:
+                analytics.create_visualizations()
+        except ImportError:
+            print("⚠️  Matplotlib not available. Skipping visualizations.")
+            print("   Install with: pip install matplotlib seaborn")
+        
+        print("\n✅ Analytics complete!")
+        return analytics
+    finally:
+        finish_profiling()
 
 if __name__ == "__main__":
     main()
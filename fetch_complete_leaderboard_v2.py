@@ -1,41 +1,299 @@
 """
 Улучшенный парсер полного лидерборда Reya с детальным логированием
 """
+import argparse
 import requests
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+from array import array
 from datetime import datetime
 
-def fetch_complete_leaderboard_v2():
+from leaderboard_io import LeaderboardStore, WalletIndex, numeric_values, wallet_key, write_snapshot
+from quantile_sketch import KLLSketch, SketchSet, rank_error, save_sketches
+from stage_profiler import finish_profiling, profiled, profiling_from_env, stage
+
+# Реестр эндпоинтов лидербордов: имя -> URL.
+# Кроме основного борда - соседние эндпоинты, которые проверяет test_api.py.
+# Дополнительные борды (по категориям или сезонам) добавляются сюда
+# или через --endpoint NAME=URL.
+LEADERBOARD_ENDPOINTS = {
+    'total': "https://api.reya.xyz/api/incentives/leaderBoard/total",
+    'incentives': "https://api.reya.xyz/api/incentives/leaderboard",
+    'global': "https://api.reya.xyz/api/leaderboard",
+}
+
+# Квантильные скетчи последнего снапшота (см. quantile_sketch.py)
+SKETCHES_FILE = 'reya_sketches.json'
+
+
+class CrawlAborted(Exception):
+    """Raised by an ``on_request`` hook to stop a crawl; no snapshot is returned"""
+
+
+def _silent(*args, **kwargs):
+    pass
+
+
+def _error_logger(verbose, base_url):
+    """Errors are always printed; in quiet mode they are tagged with the board URL"""
+    if verbose:
+        return print
+    
+    def error(message):
+        print(f"   [{base_url}] {message.strip()}")
+    return error
+
+
+class LeaderboardMerger:
+    """
+    Онлайн-дедупликация записей по walletAddress по мере прихода страниц.
+
+    Если кошелек встречается повторно (борд сдвинулся во время парсинга),
+    остается более свежая запись - пришедшая позже. Смена rank фиксируется
+    как событие 'shift', а занятие одного rank разными кошельками - как
+    'overlap'. События считаются счетчиками; в ``events`` хранятся только
+    первые ``MAX_EVENTS`` (для overlap - с числом других кошельков на этом
+    rank, а не их списком), чтобы длинные хвосты с одинаковым rank не
+    давали квадратичного роста памяти. Записи с нечисловыми rank или
+    points отбрасываются до изменения состояния (счетчик ``rejected``).
+
+    Записи сразу раскладываются в компактное колоночное хранилище
+    (``LeaderboardStore``: типизированные массивы rank/points и упакованные
+    кошельки), а не хранятся как dict-ы ответа API. Кошелек ищется через
+    ``WalletIndex`` (хеш-таблица номеров строк в массиве), строка по rank -
+    через массив слотов, поэтому итоговый порядок получается обходом
+    диапазона rank без полной сортировки.
+
+    Каждый новый кошелек сразу попадает в квантильные скетчи (``sketches``).
+    Из KLL-скетча значение не удалить, поэтому если записи заменялись
+    (были повторные кошельки), ``finish`` пересобирает скетчи по итоговым
+    записям - статистика заголовка совпадает с сохраняемыми строками.
+
+    С ``keep_records`` сохраняется и последняя исходная запись каждого
+    кошелька, и ``finish`` возвращает список этих записей со всеми полями
+    борда (нужно для объединения бордов с другим набором полей).
+    """
+
+    # Насколько массив слотов может вырасти за один раз; более далекие rank
+    # хранятся в словаре, чтобы случайный огромный rank не раздувал массив
+    SLOT_SLACK = 1 << 16
+    MAX_EVENTS = 100
+
+    def __init__(self, sketches=None, keep_records=False):
+        self.sketches = sketches if sketches is not None else SketchSet()
+        self.store = LeaderboardStore()
+        self.records = {} if keep_records else None  # строка -> исходная запись
+        self.index = WalletIndex(self.store)  # кошелек -> строка хранилища
+        self.rank_slots = array('i')     # rank -> первая строка с этим rank (-1 - пусто)
+        self.rank_extra = {}             # rank -> следующие строки (пересечения rank)
+        self.far_ranks = {}              # rank вне массива слотов -> [строки]
+        self.events = []                 # первые MAX_EVENTS событий
+        self.shifts = 0
+        self.overlaps = 0
+        self.received = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.last_rank = 0
+        self.min_rank = None
+        self.max_rank = None
+
+    def __len__(self):
+        return len(self.store)
+
+    def _in_slots(self, rank, grow=False):
+        if rank in self.far_ranks or rank < 0:
+            return False
+        if rank < len(self.rank_slots):
+            return True
+        if not grow or rank >= 2 * len(self.rank_slots) + self.SLOT_SLACK:
+            return False
+        size = max(rank + 1, 2 * len(self.rank_slots))
+        self.rank_slots.extend(array('i', [-1]) * (size - len(self.rank_slots)))
+        return True
+
+    def _link(self, row, rank):
+        """Place ``row`` at ``rank``; returns how many rows already hold it"""
+        if not self._in_slots(rank, grow=True):
+            bucket = self.far_ranks.setdefault(rank, [])
+            bucket.append(row)
+            return len(bucket) - 1
+        if self.rank_slots[rank] < 0:
+            self.rank_slots[rank] = row
+            return 0
+        extra = self.rank_extra.setdefault(rank, [])
+        extra.append(row)
+        return len(extra)
+
+    def _event(self, event):
+        if len(self.events) < self.MAX_EVENTS:
+            self.events.append(event)
+
+    def _unlink(self, row, rank):
+        if not self._in_slots(rank):
+            bucket = self.far_ranks[rank]
+            bucket.remove(row)
+            if not bucket:
+                del self.far_ranks[rank]
+            return
+        extra = self.rank_extra.get(rank)
+        if self.rank_slots[rank] == row:
+            self.rank_slots[rank] = extra.pop(0) if extra else -1
+        else:
+            extra.remove(row)
+        if extra is not None and not extra:
+            del self.rank_extra[rank]
+
+    def add_page(self, records, page):
+        """Merge one page of records; returns the number of new wallets"""
+        added = 0
+        store = self.store
+        for entry in records:
+            self.received += 1
+            # Конвертируем до изменения индексов: запись с нечисловым rank
+            # или points отбрасывается целиком
+            try:
+                values = numeric_values(entry)
+            except ValueError as e:
+                self.rejected += 1
+                self._event({'type': 'rejected', 'page': page, 'error': str(e)})
+                continue
+            rank = values[0]
+            wallet = entry.get('walletAddress')
+            packed = wallet_key(wallet)
+            key = packed if wallet else ('rank', rank)
+            label = wallet or key
+            
+            row = self.index.setdefault(key, len(store))
+            if row < len(store):
+                self.duplicates += 1
+                old_rank = store.columns['rank'][row]
+                if old_rank != rank:
+                    self.shifts += 1
+                    self._event({'type': 'shift', 'wallet': label, 'page': page,
+                                 'fromRank': old_rank, 'toRank': rank})
+                self._unlink(row, old_rank)
+                store.update(row, entry, values)
+            else:
+                added += 1
+                self.sketches.update(entry)
+                store.append(entry, packed, values)
+            if self.records is not None:
+                self.records[row] = entry
+            
+            others = self._link(row, rank)
+            if others:
+                self.overlaps += 1
+                self._event({'type': 'overlap', 'wallet': label, 'page': page,
+                             'rank': rank, 'otherWallets': others})
+            
+            self.min_rank = rank if self.min_rank is None else min(self.min_rank, rank)
+            self.max_rank = rank if self.max_rank is None else max(self.max_rank, rank)
+            self.last_rank = rank
+        return added
+
+    def finish(self):
+        """
+        Завершает слияние: возвращает хранилище, переупорядоченное на месте
+        по rank (внутри одного rank - в порядке прихода), или список исходных
+        записей в том же порядке при ``keep_records``. После этого
+        добавлять страницы нельзя.
+        """
+        order = array('i')
+        far = sorted(self.far_ranks)
+        f = 0
+        for rank, row in enumerate(self.rank_slots):
+            if row < 0:
+                continue
+            while f < len(far) and far[f] < rank:
+                order.extend(self.far_ranks[far[f]])
+                f += 1
+            order.append(row)
+            extra = self.rank_extra.get(rank)
+            if extra:
+                order.extend(extra)
+        for rank in far[f:]:
+            order.extend(self.far_ranks[rank])
+        
+        # Индексы больше не нужны - освобождаем их до перестановки
+        self.index = self.rank_slots = self.rank_extra = self.far_ranks = None
+        if self.duplicates:
+            self._rebuild_sketches()
+        if self.records is not None:
+            records, self.records = self.records, None
+            return [records[row] for row in order]
+        return self.store.reorder(order)
+
+    def _rebuild_sketches(self):
+        """Refill the sketches (in place) from the stored, freshest records"""
+        sketches = self.sketches.sketches
+        for i, (column, sketch) in enumerate(sketches.items()):
+            fresh = KLLSketch(sketch.k, seed=i)
+            fresh.extend(self.store.columns.get(column, ()))
+            sketches[column] = fresh
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'uniqueWallets': len(self.store),
+            'duplicates': self.duplicates,
+            'rejected': self.rejected,
+            'rankShifts': self.shifts,
+            'rankOverlaps': self.overlaps
+        }
+
+
+@profiled('fetch')
+def fetch_complete_leaderboard_v2(base_url=LEADERBOARD_ENDPOINTS['total'], verbose=True, sketches=None,
+                                  on_request=None, keep_records=False):
     """
-    Fetch complete Reya leaderboard with improved pagination handling
+    Fetch complete Reya leaderboard with improved pagination handling.
+    
+    Per-category quantile sketches are updated page by page; pass a
+    ``SketchSet`` as ``sketches`` to keep them (e.g. to persist them).
+    ``on_request`` is called before every HTTP request, retries included
+    (e.g. to charge a request budget); the total is ``requestsMade``.
+    If it raises ``CrawlAborted`` the crawl stops and the exception
+    propagates to the caller.
+    The leaderboard is a ``LeaderboardStore`` of the core columns, or with
+    ``keep_records`` a list of the API records with all their fields.
     """
     
-    base_url = "https://api.reya.xyz/api/incentives/leaderBoard/total"
-    all_data = []
+    log = print if verbose else _silent
+    error = _error_logger(verbose, base_url)
+    merger = LeaderboardMerger(sketches, keep_records)
+    requests_made = 0
+    
+    def get(params=None):
+        nonlocal requests_made
+        requests_made += 1
+        if on_request is not None:
+            on_request()
+        return requests.get(base_url, params=params, timeout=30)
+    
     page = 1
     max_pages = 10000  # Увеличено для получения всех 80,000+ записей (4000+ страниц)
     
-    print("=" * 70)
-    print("🚀 НАЧАЛО ПАРСИНГА ПОЛНОГО ЛИДЕРБОРДА REYA")
-    print("=" * 70)
-    print(f"⏰ Время старта: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"🔗 URL: {base_url}\n")
+    log("=" * 70)
+    log("🚀 НАЧАЛО ПАРСИНГА ПОЛНОГО ЛИДЕРБОРДА REYA")
+    log("=" * 70)
+    log(f"⏰ Время старта: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    log(f"🔗 URL: {base_url}\n")
     
     # Первый запрос без параметров
-    print(f"📡 Страница {page}: Запрос начальных данных...")
+    log(f"📡 Страница {page}: Запрос начальных данных...")
     
     try:
-        response = requests.get(base_url, timeout=30)
+        response = get()
         
         if response.status_code != 200:
-            print(f"❌ Ошибка HTTP {response.status_code}")
-            print(f"   Ответ: {response.text[:500]}")
+            error(f"❌ Ошибка HTTP {response.status_code}")
+            error(f"   Ответ: {response.text[:500]}")
             return None
         
         data = response.json()
-        print(f"✅ Успешный ответ")
-        print(f"   Структура ответа: {list(data.keys())}")
+        log(f"✅ Успешный ответ")
+        log(f"   Структура ответа: {list(data.keys())}")
         
         # Определяем структуру данных
         if 'data' in data:
@@ -45,10 +303,10 @@ def fetch_complete_leaderboard_v2():
             records = data['leaderboard']
             data_key = 'leaderboard'
         else:
-            print(f"❌ Неизвестная структура данных: {list(data.keys())}")
+            error(f"❌ Неизвестная структура данных: {list(data.keys())}")
             return None
         
-        all_data.extend(records)
+        merger.add_page(records, page)
         
         if records:
             first_rank = records[0].get('rank', 'N/A')
@@ -56,13 +314,13 @@ def fetch_complete_leaderboard_v2():
             first_points = records[0].get('totalPoints', 0)
             last_points = records[-1].get('totalPoints', 0)
             
-            print(f"   📊 Получено записей: {len(records)}")
-            print(f"   🔢 Диапазон ranks: {first_rank} → {last_rank}")
-            print(f"   💰 Диапазон points: {first_points:.2f} → {last_points:.2f}")
+            log(f"   📊 Получено записей: {len(records)}")
+            log(f"   🔢 Диапазон ranks: {first_rank} → {last_rank}")
+            log(f"   💰 Диапазон points: {first_points:.2f} → {last_points:.2f}")
         
         # Проверяем метаданные пагинации
         meta = data.get('meta', {})
-        print(f"   🔍 Метаданные: {meta}")
+        log(f"   🔍 Метаданные: {meta}")
         
         after = meta.get('after')
         has_more = meta.get('hasMore', False)
@@ -70,13 +328,13 @@ def fetch_complete_leaderboard_v2():
         # Если есть пагинация, продолжаем
         while (after or has_more) and page < max_pages:
             page += 1
-            print(f"\n📡 Страница {page}: Запрос следующей порции (after={after})...")
+            log(f"\n📡 Страница {page}: Запрос следующей порции (after={after})...")
             
             # Пробуем разные варианты параметров
             params_variants = [
                 {'after': after},
                 {'cursor': after},
-                {'offset': len(all_data)},
+                {'offset': merger.received},
                 {'page': page},
             ]
             
@@ -89,7 +347,7 @@ def fetch_complete_leaderboard_v2():
                         continue
                 
                 try:
-                    response = requests.get(base_url, params=params, timeout=30)
+                    response = get(params)
                     
                     if response.status_code != 200:
                         continue
@@ -98,21 +356,21 @@ def fetch_complete_leaderboard_v2():
                     records = data.get(data_key, [])
                     
                     if not records:
-                        print(f"   ⚠️  Пустой ответ с параметрами {params}")
-                        print(f"   ✅ Достигнут конец данных - всего получено {len(all_data)} записей")
+                        log(f"   ⚠️  Пустой ответ с параметрами {params}")
+                        log(f"   ✅ Достигнут конец данных - всего получено {len(merger)} записей")
                         success = False
                         break
                     
                     # Проверяем, не дубликаты ли это
-                    first_new_rank = records[0].get('rank', 0)
-                    last_existing_rank = all_data[-1].get('rank', 0) if all_data else 0
+                    first_new_rank = numeric_values(records[0])[0]
+                    last_existing_rank = merger.last_rank
                     
                     if first_new_rank <= last_existing_rank:
-                        print(f"   ⚠️  Дубликаты данных (rank {first_new_rank} <= {last_existing_rank})")
+                        log(f"   ⚠️  Дубликаты данных (rank {first_new_rank} <= {last_existing_rank})")
                         continue
                     
                     # Успешно получили новые данные
-                    all_data.extend(records)
+                    merger.add_page(records, page)
                     success = True
                     
                     first_rank = records[0].get('rank', 'N/A')
@@ -120,10 +378,10 @@ def fetch_complete_leaderboard_v2():
                     first_points = records[0].get('totalPoints', 0)
                     last_points = records[-1].get('totalPoints', 0)
                     
-                    print(f"   ✅ Получено записей: {len(records)} (параметры: {params})")
-                    print(f"   🔢 Диапазон ranks: {first_rank} → {last_rank}")
-                    print(f"   💰 Диапазон points: {first_points:.2f} → {last_points:.2f}")
-                    print(f"   📈 Всего накоплено: {len(all_data)} записей")
+                    log(f"   ✅ Получено записей: {len(records)} (параметры: {params})")
+                    log(f"   🔢 Диапазон ranks: {first_rank} → {last_rank}")
+                    log(f"   💰 Диапазон points: {first_points:.2f} → {last_points:.2f}")
+                    log(f"   📈 Всего накоплено: {len(merger)} записей")
                     
                     # Обновляем метаданные
                     meta = data.get('meta', {})
@@ -131,16 +389,18 @@ def fetch_complete_leaderboard_v2():
                     has_more = meta.get('hasMore', False)
                     
                     if meta:
-                        print(f"   🔍 Новые метаданные: {meta}")
+                        log(f"   🔍 Новые метаданные: {meta}")
                     
                     break
                     
+                except CrawlAborted:
+                    raise
                 except Exception as e:
-                    print(f"   ⚠️  Ошибка с параметрами {params}: {e}")
+                    error(f"   ⚠️  Ошибка с параметрами {params}: {e}")
                     continue
             
             if not success:
-                print(f"   ✅ Парсинг завершен - получены все доступные данные")
+                log(f"   ✅ Парсинг завершен - получены все доступные данные")
                 break
             
             # Пауза между запросами (уменьшена для ускорения)
@@ -148,101 +408,212 @@ def fetch_complete_leaderboard_v2():
             
             # Прогресс каждые 100 страниц
             if page % 100 == 0:
-                print(f"\n📊 Прогресс: {page} страниц, {len(all_data):,} записей")
+                log(f"\n📊 Прогресс: {page} страниц, {len(merger):,} записей")
         
         if page >= max_pages:
-            print(f"\n⚠️  Достигнут лимит страниц ({max_pages}) - возможно есть еще данные")
+            log(f"\n⚠️  Достигнут лимит страниц ({max_pages}) - возможно есть еще данные")
         
+    except CrawlAborted:
+        raise
     except Exception as e:
-        print(f"\n❌ Критическая ошибка: {e}")
+        error(f"\n❌ Критическая ошибка: {e}")
         import traceback
         traceback.print_exc()
         return None
     
-    # Финальная обработка
-    print("\n" + "=" * 70)
-    print("📊 ФИНАЛЬНАЯ ОБРАБОТКА ДАННЫХ")
-    print("=" * 70)
+    return _finalize_leaderboard(merger, base_url, page, requests_made, log)
+
+
+@profiled('post_process')
+def _finalize_leaderboard(merger, base_url, page, requests_made, log):
+    """Final ordering, statistics and header of a completed crawl"""
+    log("\n" + "=" * 70)
+    log("📊 ФИНАЛЬНАЯ ОБРАБОТКА ДАННЫХ")
+    log("=" * 70)
     
-    print(f"✅ Всего получено записей: {len(all_data)}")
+    merge_stats = merger.stats()
+    log(f"✅ Всего получено записей: {merge_stats['received']}")
     
-    if not all_data:
-        print("❌ Нет данных для сохранения")
+    if not len(merger):
+        log("❌ Нет данных для сохранения")
         return None
     
-    # Сортировка по rank
-    print("🔄 Сортировка по rank...")
-    all_data.sort(key=lambda x: x.get('rank', 0))
+    # Дубликаты уже разрешены по кошельку во время парсинга
+    if merge_stats['duplicates']:
+        log(f"⚠️  Повторные кошельки: {merge_stats['duplicates']} "
+            f"(сдвигов rank: {merge_stats['rankShifts']}, пересечений rank: {merge_stats['rankOverlaps']})")
+        for event in merger.events[:5]:
+            log(f"   {event}")
+    if merge_stats['rejected']:
+        log(f"⚠️  Отброшено записей с нечисловыми rank/points: {merge_stats['rejected']}")
+    log(f"   ✅ Уникальных кошельков: {merge_stats['uniqueWallets']}")
     
-    # Проверка на дубликаты
-    ranks = [entry.get('rank') for entry in all_data]
-    unique_ranks = len(set(ranks))
+    all_data = merger.finish()
     
-    if unique_ranks < len(ranks):
-        print(f"⚠️  Обнаружены дубликаты ranks: {len(ranks)} записей, {unique_ranks} уникальных")
-        # Удаляем дубликаты, оставляя первое вхождение
-        seen_ranks = set()
-        unique_data = []
-        for entry in all_data:
-            rank = entry.get('rank')
-            if rank not in seen_ranks:
-                seen_ranks.add(rank)
-                unique_data.append(entry)
-        all_data = unique_data
-        print(f"   ✅ После удаления дубликатов: {len(all_data)} записей")
+    # Статистика по скетчам: точные min/max/среднее, приближенные доли
+    points = merger.sketches['totalPoints']
+    n = points.count
     
-    # Статистика
-    ranks = [entry.get('rank', 0) for entry in all_data]
-    points = [entry.get('totalPoints', 0) for entry in all_data]
+    log(f"\n📈 СТАТИСТИКА:")
+    log(f"   🔢 Ranks: {merger.min_rank} → {merger.max_rank}")
+    log(f"   💰 Points: {points.minimum:.2f} → {points.maximum:.2f}")
+    log(f"   📊 Средние points: {points.total / n:.2f}")
     
-    print(f"\n📈 СТАТИСТИКА:")
-    print(f"   🔢 Ranks: {min(ranks)} → {max(ranks)}")
-    print(f"   💰 Points: {min(points):.2f} → {max(points):.2f}")
-    print(f"   📊 Средние points: {sum(points)/len(points):.2f}")
+    # Распределение по диапазонам (погрешность доли ≤ rank_error)
+    edges = [0, 1, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+    below = [points.rank(edge, inclusive=False) for edge in edges[1:]] + [1.0]
+    shares = [share - previous for share, previous in zip(below, [0.0] + below[:-1])]
+    names = [
+        f"{edges[i]}-{edges[i + 1]}" if i + 1 < len(edges) else f"{edges[i]}+"
+        for i in range(len(edges))
+    ]
+    # Наибольшие остатки: сумма по диапазонам равна числу записей
+    ranges = dict(zip(names, _largest_remainder(shares, n)))
     
-    # Распределение по диапазонам
-    ranges = {
-        '0-1': 0, '1-5': 0, '5-10': 0, '10-20': 0, '20-50': 0,
-        '50-100': 0, '100-200': 0, '200-500': 0, '500-1000': 0,
-        '1000-2000': 0, '2000-5000': 0, '5000+': 0
-    }
-    
-    for p in points:
-        if p < 1: ranges['0-1'] += 1
-        elif p < 5: ranges['1-5'] += 1
-        elif p < 10: ranges['5-10'] += 1
-        elif p < 20: ranges['10-20'] += 1
-        elif p < 50: ranges['20-50'] += 1
-        elif p < 100: ranges['50-100'] += 1
-        elif p < 200: ranges['100-200'] += 1
-        elif p < 500: ranges['200-500'] += 1
-        elif p < 1000: ranges['500-1000'] += 1
-        elif p < 2000: ranges['1000-2000'] += 1
-        elif p < 5000: ranges['2000-5000'] += 1
-        else: ranges['5000+'] += 1
-    
-    print(f"\n📊 РАСПРЕДЕЛЕНИЕ ПО ДИАПАЗОНАМ:")
+    log(f"\n📊 РАСПРЕДЕЛЕНИЕ ПО ДИАПАЗОНАМ (±{rank_error(points.k):.1%}):")
     for range_name, count in ranges.items():
         if count > 0:
-            pct = (count / len(all_data)) * 100
-            print(f"   {range_name:12} : {count:5} ({pct:5.1f}%)")
+            pct = (count / n) * 100
+            log(f"   {range_name:12} : {count:5} ({pct:5.1f}%)")
     
     # Создание финального датасета
     final_data = {
         "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
         "source": base_url,
         "totalEntries": len(all_data),
-        "minPoints": min(points),
-        "maxPoints": max(points),
-        "avgPoints": sum(points) / len(points),
+        "minPoints": points.minimum,
+        "maxPoints": points.maximum,
+        "avgPoints": points.total / n,
+        "percentiles": merger.sketches.percentiles(),
+        "percentileRankError": rank_error(points.k),
+        "pagesFetched": page,
+        "requestsMade": requests_made,
+        "mergeStats": merge_stats,
         "leaderboard": all_data
     }
     
     return final_data
 
 
-if __name__ == "__main__":
-    leaderboard_data = fetch_complete_leaderboard_v2()
+def _largest_remainder(shares, total):
+    """Integer counts for ``shares`` (fractions summing to 1) that add up to ``total``"""
+    exact = [share * total for share in shares]
+    counts = [int(value) for value in exact]
+    by_remainder = sorted(range(len(exact)), key=lambda i: exact[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def fetch_multiple_leaderboards(names=None, endpoints=None, max_workers=None):
+    """
+    Crawl several leaderboard endpoints concurrently.
+    Returns {name: final_data} for every board that was fetched successfully;
+    records keep every field their board returns (not only the core columns).
+    """
+    endpoints = endpoints or LEADERBOARD_ENDPOINTS
+    names = names or list(endpoints)
+    
+    print(f"🚀 Параллельный парсинг {len(names)} лидербордов: {', '.join(names)}")
+    
+    # Прогресс отдельных бордов не печатается, чтобы не перемешивать вывод;
+    # ошибки печатаются с URL борда
+    with ThreadPoolExecutor(max_workers=max_workers or len(names)) as pool:
+        futures = {
+            name: pool.submit(fetch_complete_leaderboard_v2, endpoints[name], False, keep_records=True)
+            for name in names
+        }
+        boards = {}
+        for name, future in futures.items():
+            result = future.result()
+            if result:
+                boards[name] = result
+                print(f"   ✅ {name}: {result['totalEntries']:,} записей")
+            else:
+                print(f"   ❌ {name}: не удалось получить данные")
+    
+    return boards
+
+
+@profiled('post_process.join')
+def join_leaderboards(boards):
+    """
+    Hash join of several leaderboards on walletAddress.
+    Each board is scanned once; fields are prefixed with the board name
+    (e.g. total_rank, total_totalPoints). Wallets missing from a board
+    simply lack that board's columns. Addresses are joined (and written)
+    lowercased, so checksummed and lowercase forms of a wallet match.
+    """
+    table = {}
+    for name, board in boards.items():
+        for entry in board['leaderboard']:
+            wallet = entry.get('walletAddress')
+            if not wallet:
+                continue
+            wallet = wallet.lower()
+            row = table.get(wallet)
+            if row is None:
+                row = table[wallet] = {'walletAddress': wallet}
+            for key, value in entry.items():
+                if key != 'walletAddress':
+                    row[f"{name}_{key}"] = value
+    
+    return {
+        "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "boards": {
+            name: {"source": board['source'], "totalEntries": board['totalEntries']}
+            for name, board in boards.items()
+        },
+        "totalWallets": len(table),
+        "wallets": list(table.values())
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Reya leaderboard fetcher')
+    parser.add_argument('--boards', default=None,
+                        help='Comma-separated board names to crawl concurrently and join on wallet')
+    parser.add_argument('--endpoint', action='append', default=[], metavar='NAME=URL',
+                        help='Add or override a leaderboard endpoint in the registry')
+    parser.add_argument('--joined-output', default='reya_multi_leaderboard.json',
+                        help='Output file for the joined multi-board table')
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='reya_profile.json', default=None,
+                        help='Write a per-stage timing/cProfile/tracemalloc report '
+                             '(default reya_profile.json; or set REYA_PROFILE)')
+    return parser.parse_args()
+
+
+def run_multi_board(names, endpoints, output):
+    """Crawl several boards, join them on wallet and save the wide table"""
+    boards = fetch_multiple_leaderboards(names, endpoints)
+    if not boards:
+        print("\n❌ Не удалось получить ни одного лидерборда")
+        return False
+    
+    joined = join_leaderboards(boards)
+    with stage('write'), open(output, 'w', encoding='utf-8') as f:
+        json.dump(joined, f, indent=2, ensure_ascii=False)
+    
+    print(f"\n✅ Объединенная таблица сохранена в {output}")
+    print(f"👛 Уникальных кошельков: {joined['totalWallets']:,}")
+    return True
+
+
+def main(args):
+    endpoints = dict(LEADERBOARD_ENDPOINTS)
+    for item in args.endpoint:
+        name, _, url = item.partition('=')
+        endpoints[name.strip()] = url.strip()
+    
+    if args.boards:
+        names = [name.strip() for name in args.boards.split(',') if name.strip()]
+        unknown = [name for name in names if name not in endpoints]
+        if unknown:
+            raise SystemExit(f"❌ Неизвестные лидерборды: {', '.join(unknown)}")
+        raise SystemExit(0 if run_multi_board(names, endpoints, args.joined_output) else 1)
+    
+    sketches = SketchSet()
+    leaderboard_data = fetch_complete_leaderboard_v2(endpoints['total'], sketches=sketches)
     
     if leaderboard_data:
         # Сохранение в JSON
@@ -250,10 +621,12 @@ if __name__ == "__main__":
         
         print(f"\n💾 Сохранение в {filename}...")
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(leaderboard_data, f, indent=2, ensure_ascii=False)
+        with stage('write'):
+            write_snapshot(filename, leaderboard_data)
+            save_sketches(SKETCHES_FILE, sketches, leaderboard_data['timestamp'], leaderboard_data['source'])
         
         print(f"✅ Данные успешно сохранены!")
+        print(f"📐 Квантильные скетчи сохранены в {SKETCHES_FILE}")
         print(f"\n📄 Файл: {filename}")
         print(f"📊 Всего пользователей: {leaderboard_data['totalEntries']:,}")
         print(f"💰 Диапазон points: {leaderboard_data['minPoints']:.2f} - {leaderboard_data['maxPoints']:.2f}")
@@ -277,3 +650,12 @@ if __name__ == "__main__":
         print("\n" + "=" * 70)
         print("❌ ПАРСИНГ ЗАВЕРШЕН С ОШИБКОЙ")
         print("=" * 70)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiling_from_env(args.profile)
+    try:
+        main(args)
+    finally:
+        finish_profiling()
@@ -0,0 +1,277 @@
+"""
+Адаптивный планировщик обновления лидерборда Reya (локальный режим фетчера).
+
+Вместо фиксированного ежедневного запуска планировщик дешево опрашивает
+первые страницы борда, оценивает скорость изменений и подстраивает частоту:
+- каждый опрос (probe) сохраняет свежий топ в reya_top_leaderboard.json
+  (частичное обновление), если топ изменился;
+- полный парсинг запускается, когда накопленная доля изменений превышает
+  порог или снапшот устарел сильнее max_staleness;
+- все запросы (включая повторы при пагинации) учитываются в суточном
+  бюджете по мере выполнения; полный парсинг, исчерпавший бюджет,
+  прерывается без сохранения и считается отложенным;
+- ошибки сети, ответы не 200 и пустой топ не останавливают демон: опрос
+  считается неудачным (скорость, накопленные изменения и прошлый топ не
+  меняются), а интервал до следующего растет экспоненциально.
+"""
+import argparse
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+
+import requests
+
+from fetch_complete_leaderboard_v2 import (
+    LEADERBOARD_ENDPOINTS, SKETCHES_FILE, CrawlAborted, fetch_complete_leaderboard_v2
+)
+from leaderboard_io import write_snapshot
+from quantile_sketch import SketchSet, save_sketches
+
+DAY = 24 * 3600
+
+
+class RequestBudget:
+    """Rolling 24h budget of API requests"""
+
+    def __init__(self, per_day):
+        self.per_day = per_day
+        self.spent = deque()  # (timestamp, count)
+
+    def _expire(self, now):
+        while self.spent and now - self.spent[0][0] >= DAY:
+            self.spent.popleft()
+
+    def available(self, now=None):
+        now = now or time.time()
+        self._expire(now)
+        return self.per_day - sum(count for _, count in self.spent)
+
+    def spend(self, count, now=None):
+        self.spent.append((now or time.time(), count))
+
+
+def fetch_top_pages(url, pages, on_request=None):
+    """
+    Fetch the first ``pages`` pages of a board; returns (records, requests_made).
+    ``on_request`` is called before every request. A non-200 response or an
+    empty first page raises, so a partial sample is never taken for the top.
+    """
+    records = []
+    params = {}
+    made = 0
+    for _ in range(pages):
+        made += 1
+        if on_request is not None:
+            on_request()
+        response = requests.get(url, params=params, timeout=30)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        data = response.json()
+        page_records = data.get('data', data.get('leaderboard', []))
+        if not records and not page_records:
+            raise ValueError("Empty first page")
+        records.extend(page_records)
+        after = data.get('meta', {}).get('after')
+        if not page_records or not after:
+            break
+        params = {'after': after}
+    return records, made
+
+
+def change_fraction(previous, current):
+    """Share of wallets in the current top whose points or presence changed"""
+    if not current:
+        return 0.0
+    if previous is None:
+        return 1.0
+    changed = sum(
+        1 for entry in current
+        if previous.get(entry.get('walletAddress')) != entry.get('totalPoints')
+    )
+    return changed / len(current)
+
+
+class AdaptiveRefreshScheduler:
+    """
+    Probe the top of the board, estimate the change rate and schedule
+    probes and full crawls to match it within a daily request budget.
+    """
+
+    def __init__(self, url=LEADERBOARD_ENDPOINTS['total'], daily_budget=5000, probe_pages=2,
+                 min_interval=300, max_interval=6 * 3600, max_staleness=DAY,
+                 probe_target=0.02, full_threshold=0.10, smoothing=0.5, full_cost_estimate=4500,
+                 output='reya_complete_leaderboard.json', top_output='reya_top_leaderboard.json'):
+        self.url = url
+        self.budget = RequestBudget(daily_budget)
+        self.probe_pages = probe_pages
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_staleness = max_staleness
+        self.probe_target = probe_target
+        self.full_threshold = full_threshold
+        self.smoothing = smoothing
+        self.output = output
+        self.top_output = top_output
+
+        self.previous_top = None
+        self.last_probe_at = None
+        self.last_full_at = None
+        self.rate = None           # доля изменений топа в час (EWMA)
+        self.pending_change = 0.0  # накопленные изменения с последнего полного парсинга
+        # Запросов на полный парсинг: оценка до первого запуска, потом - по последнему
+        self.full_cost = full_cost_estimate
+        self.failures = 0          # подряд неудачных опросов (для экспоненциальной паузы)
+
+    def _charge(self):
+        """
+        Charge one request to the budget (called from crawl threads);
+        raises ``CrawlAborted`` instead once the budget is used up
+        """
+        if self.budget.available() <= 0:
+            raise CrawlAborted("daily request budget exhausted")
+        self.budget.spend(1)
+
+    def next_interval(self):
+        """Seconds until the next probe: aim for ~probe_target change per probe"""
+        if self.failures:
+            return min(self.max_interval, self.min_interval * 2 ** (self.failures - 1))
+        if not self.rate:
+            return self.max_interval if self.rate == 0 else self.min_interval
+        interval = self.probe_target / self.rate * 3600
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    async def probe(self):
+        """Cheap sample of the top pages; updates the change-rate estimate"""
+        if self.budget.available() < self.probe_pages:
+            print("⏸️  Бюджет запросов исчерпан - опрос пропущен")
+            return 0.0
+        try:
+            records, _ = await asyncio.to_thread(fetch_top_pages, self.url, self.probe_pages, self._charge)
+        except CrawlAborted:
+            print("⏸️  Бюджет запросов исчерпан - опрос прерван")
+            return 0.0
+        except (requests.RequestException, ValueError) as e:
+            self.failures += 1
+            print(f"⚠️  Опрос не удался ({self.failures} подряд): {e}")
+            return 0.0
+        self.failures = 0
+        now = time.time()
+
+        fraction = change_fraction(self.previous_top, records)
+        if self.last_probe_at is not None:
+            hours = max((now - self.last_probe_at) / 3600, 1e-6)
+            observed = fraction / hours
+            self.rate = observed if self.rate is None else (
+                self.smoothing * observed + (1 - self.smoothing) * self.rate
+            )
+        self.previous_top = {e.get('walletAddress'): e.get('totalPoints') for e in records}
+        self.last_probe_at = now
+        self.pending_change += fraction
+
+        if fraction > 0 and records:
+            self.save(self.top_output, {
+                "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "source": self.url,
+                "totalEntries": len(records),
+                "partial": True,
+                "leaderboard": records
+            })
+        rate = f"{self.rate:.3f}/ч" if self.rate is not None else "n/a"
+        print(f"🔎 Опрос топа: {len(records)} записей, изменилось {fraction:.1%}, "
+              f"скорость {rate}, накоплено {self.pending_change:.1%}")
+        return fraction
+
+    def full_refresh_due(self, now):
+        if self.last_full_at is None or now - self.last_full_at >= self.max_staleness:
+            return True
+        return self.pending_change >= self.full_threshold
+
+    async def full_refresh(self):
+        """Complete crawl, if the remaining budget covers its estimated cost"""
+        cost = self.full_cost
+        if self.budget.available() < cost:
+            print(f"⏸️  Полный парсинг отложен: нужно ~{cost} запросов, "
+                  f"доступно {self.budget.available()}")
+            return False
+        print("🔄 Полный парсинг...")
+        sketches = SketchSet()
+        made = 0
+
+        def charge():
+            nonlocal made
+            self._charge()
+            made += 1
+
+        try:
+            data = await asyncio.to_thread(fetch_complete_leaderboard_v2, self.url, False, sketches, charge)
+        except CrawlAborted:
+            # Парсинг стоит больше, чем сделано запросов; снапшот не сохраняется
+            self.full_cost = max(self.full_cost, made + 1)
+            print(f"⏸️  Полный парсинг прерван: бюджет исчерпан после {made} запросов, "
+                  "отложен")
+            return False
+        now = time.time()
+        if not data:
+            print("❌ Полный парсинг не удался")
+            return False
+        self.full_cost = data['requestsMade']
+        self.save(self.output, data)
+        save_sketches(SKETCHES_FILE, sketches, data['timestamp'], data['source'])
+        self.last_full_at = now
+        self.pending_change = 0.0
+        print(f"✅ Полный снапшот: {data['totalEntries']:,} записей, {self.full_cost} запросов")
+        return True
+
+    @staticmethod
+    def save(filename, data):
+        write_snapshot(filename, data)
+
+    async def run(self, max_cycles=None):
+        """Probe / refresh loop; runs forever unless ``max_cycles`` is given"""
+        cycle = 0
+        while max_cycles is None or cycle < max_cycles:
+            cycle += 1
+            await self.probe()
+            if self.full_refresh_due(time.time()):
+                await self.full_refresh()
+            delay = self.next_interval()
+            print(f"⏰ Следующий опрос через {delay / 60:.1f} мин "
+                  f"(бюджет: {self.budget.available()}/{self.budget.per_day})")
+            if max_cycles is None or cycle < max_cycles:
+                await asyncio.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Adaptive Reya leaderboard refresh scheduler')
+    parser.add_argument('--url', default=LEADERBOARD_ENDPOINTS['total'])
+    parser.add_argument('--daily-budget', type=int, default=5000, help='Max API requests per 24h')
+    parser.add_argument('--probe-pages', type=int, default=2, help='Top pages sampled per probe')
+    parser.add_argument('--min-interval', type=float, default=300, help='Seconds')
+    parser.add_argument('--max-interval', type=float, default=6 * 3600, help='Seconds')
+    parser.add_argument('--max-staleness', type=float, default=DAY,
+                        help='Seconds before a full crawl is forced')
+    parser.add_argument('--full-threshold', type=float, default=0.10,
+                        help='Accumulated top-change fraction that triggers a full crawl')
+    parser.add_argument('--full-cost-estimate', type=int, default=4500,
+                        help='Requests a full crawl is assumed to need before the first one has run')
+    parser.add_argument('--max-cycles', type=int, default=None, help='Stop after N probes')
+    args = parser.parse_args()
+
+    scheduler = AdaptiveRefreshScheduler(
+        url=args.url, daily_budget=args.daily_budget, probe_pages=args.probe_pages,
+        min_interval=args.min_interval, max_interval=args.max_interval,
+        max_staleness=args.max_staleness, full_threshold=args.full_threshold,
+        full_cost_estimate=args.full_cost_estimate
+    )
+    print("=" * 70)
+    print("🗓️  АДАПТИВНЫЙ ПЛАНИРОВЩИК ОБНОВЛЕНИЙ")
+    print("=" * 70)
+    try:
+        asyncio.run(scheduler.run(args.max_cycles))
+    except KeyboardInterrupt:
+        print("\n👋 Планировщик остановлен")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Vectorized validation of a Reya leaderboard snapshot.
+
+The snapshot is read into column buffers and every invariant is checked with
+whole-array NumPy operations, so a 100k-row snapshot is validated in a few
+milliseconds once loaded. Used as the publish gate in the update workflow.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from leaderboard_io import read_leaderboard_columns
+
+ADDRESS_LENGTH = 42  # '0x' + 40 hex digits
+MAX_EXAMPLES = 5
+
+
+def _check(mask, ranks):
+    """Summarize a boolean violation mask as a check result"""
+    bad = np.flatnonzero(mask)
+    return {
+        'ok': len(bad) == 0,
+        'violations': int(len(bad)),
+        'example_ranks': ranks[bad[:MAX_EXAMPLES]].tolist()
+    }
+
+
+def _rank_contiguity(ranks, merge_stats=None):
+    """
+    Ranks must run 1, 2, 3, ...; each break in the sequence (gap, repeat or
+    step back) is one violation. Gaps and repeats left by the fetcher's
+    wallet dedupe (a wallet that moved mid-crawl leaves its old rank empty;
+    two wallets seen at one rank repeat it) pass when ``mergeStats`` from
+    the header accounts for them: at most one missing rank per duplicate and
+    one repeat per rank overlap.
+    """
+    steps = np.diff(ranks, prepend=0)
+    check = _check(steps != 1, ranks)
+    if check['ok'] or not merge_stats:
+        return check
+    missing = int(np.maximum(steps - 1, 0).sum())
+    repeated = int((steps == 0).sum())
+    if (steps >= 0).all() and missing <= merge_stats.get('duplicates', 0) \
+            and repeated <= merge_stats.get('rankOverlaps', 0):
+        check['ok'] = True
+        check['explained_by_merge'] = True
+    return check
+
+
+def _address_mask(wallets):
+    """True where a wallet is not a 0x-prefixed 40-digit hex address"""
+    n = len(wallets)
+    try:
+        # One extra byte so over-long addresses are detectable
+        raw = np.array(wallets, dtype=f'S{ADDRESS_LENGTH + 1}')
+    except UnicodeEncodeError:
+        raw = np.array([w.encode('ascii', 'replace') for w in wallets], dtype=f'S{ADDRESS_LENGTH + 1}')
+    chars = raw.view(np.uint8).reshape(n, ADDRESS_LENGTH + 1)
+    # Lowercased hex digits; OR-ing 0x20 folds 'A'-'F' onto 'a'-'f'
+    raw_digits = chars[:, 2:ADDRESS_LENGTH]
+    digits = raw_digits | np.uint8(0x20)
+    # uint8 wrap-around turns each range test into a single comparison;
+    # the raw >= '0' test rejects control bytes that fold onto digits
+    is_hex = (((digits - np.uint8(ord('0'))) < 10) | ((digits - np.uint8(ord('a'))) < 6)) & (raw_digits >= ord('0'))
+    valid = (
+        (chars[:, 0] == ord('0')) &
+        (chars[:, 1] == ord('x')) &
+        is_hex.all(axis=1) &
+        (chars[:, ADDRESS_LENGTH] == 0)
+    )
+    return ~valid, digits
+
+
+def _duplicate_mask(digits):
+    """True on every row after the first whose (lowercased) digits repeat"""
+    words = np.ascontiguousarray(digits).view(np.uint64)  # 40 bytes -> 5 words per row
+    # Cheap 64-bit row hash, then exact comparison of equal-hash neighbours
+    hashes = words[:, 0].copy()
+    with np.errstate(over='ignore'):
+        for i in range(1, words.shape[1]):
+            hashes = hashes * np.uint64(1099511628211) ^ words[:, i]
+    order = np.argsort(hashes, kind='stable')
+    same_hash = np.flatnonzero(hashes[order[1:]] == hashes[order[:-1]])
+    repeated = np.zeros(len(digits), dtype=bool)
+    for i in same_hash:
+        if np.array_equal(words[order[i]], words[order[i + 1]]):
+            repeated[order[i + 1]] = True
+    return repeated
+
+
+def validate_columns(columns, header=None, sum_rtol=1e-6, sum_atol=0.01):
+    """
+    Check a snapshot held as column buffers (see ``leaderboard_io``).
+
+    Returns a report dict with one entry per invariant and an overall ``ok``.
+    """
+    started = time.perf_counter()
+    ranks = np.frombuffer(columns['rank'], dtype=np.int64)
+    trading = np.frombuffer(columns['tradingPoints'], dtype=np.float64)
+    staking = np.frombuffer(columns['stakingPoints'], dtype=np.float64)
+    signal = np.frombuffer(columns['signalPoints'], dtype=np.float64)
+    total = np.frombuffer(columns['totalPoints'], dtype=np.float64)
+    n = len(ranks)
+
+    checks = {}
+    checks['rank_contiguity'] = _rank_contiguity(ranks, (header or {}).get('mergeStats'))
+
+    not_monotone = np.zeros(n, dtype=bool)
+    not_monotone[1:] = total[1:] > total[:-1]
+    checks['monotone_points'] = _check(not_monotone, ranks)
+
+    components = trading + staking + signal
+    checks['component_sums'] = _check(
+        ~np.isclose(components, total, rtol=sum_rtol, atol=sum_atol), ranks
+    )
+
+    points = np.stack((trading, staking, signal, total))
+    checks['finite_non_negative'] = _check(
+        (~np.isfinite(points) | (points < 0)).any(axis=0), ranks
+    )
+
+    if n:
+        bad_address, digits = _address_mask(columns['walletAddress'])
+        checks['address_format'] = _check(bad_address, ranks)
+        checks['duplicate_wallets'] = _check(_duplicate_mask(digits), ranks)
+    else:
+        checks['address_format'] = _check(np.zeros(0, dtype=bool), ranks)
+        checks['duplicate_wallets'] = _check(np.zeros(0, dtype=bool), ranks)
+
+    if header is not None and 'totalEntries' in header:
+        checks['total_entries'] = {
+            'ok': header['totalEntries'] == n,
+            'violations': int(header['totalEntries'] != n),
+            'example_ranks': []
+        }
+
+    return {
+        'ok': all(check['ok'] for check in checks.values()),
+        'rows': n,
+        'checks': checks,
+        'elapsed_ms': (time.perf_counter() - started) * 1000
+    }
+
+
+def validate_snapshot(path, **kwargs):
+    """Load a snapshot into columns and validate it"""
+    started = time.perf_counter()
+    header = {}
+    columns = read_leaderboard_columns(path, header=header)
+    load_ms = (time.perf_counter() - started) * 1000
+    report = validate_columns(columns, header=header, **kwargs)
+    report['load_ms'] = load_ms
+    return report
+
+
+def print_report(report):
+    status = "✅" if report['ok'] else "❌"
+    print(f"{status} Snapshot validation: {report['rows']:,} rows "
+          f"(load {report.get('load_ms', 0):.0f} ms, checks {report['elapsed_ms']:.1f} ms)")
+    for name, check in report['checks'].items():
+        mark = "✅" if check['ok'] else "❌"
+        line = f"   {mark} {name}: {check['violations']} violations"
+        if check.get('explained_by_merge'):
+            line += " (left by wallet dedupe, see mergeStats)"
+        if check['example_ranks']:
+            line += f" (ranks {check['example_ranks']})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a Reya leaderboard snapshot')
+    parser.add_argument('path', nargs='?', default='reya_complete_leaderboard.json')
+    parser.add_argument('--sum-tolerance', type=float, default=0.01,
+                        help='Absolute tolerance for trading+staking+signal == total')
+    args = parser.parse_args()
+
+    try:
+        report = validate_snapshot(args.path, sum_atol=args.sum_tolerance)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read {args.path}: {e}")
+        return 1
+    print_report(report)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Per-stage CPU and memory profiling for the Reya pipelines.
+
+Pipeline stages (load, each analytics method, export, render, fetch,
+post-process, write) are marked with the ``profiled`` decorator or the
+``stage`` context manager. They cost a single check while profiling is off.
+Turn it on with ``--profile`` on the analytics or fetcher command line, or
+with the ``REYA_PROFILE`` environment variable (``1`` for the default
+report path, or the report path itself).
+
+For every stage the profiler records wall and CPU time, a cProfile of the
+functions it ran, and tracemalloc's peak and net allocation. Setting
+``REYA_PROFILE_ALLOCATIONS=1`` also records the source lines that allocated
+most. This takes two heap snapshots per stage and costs seconds per call
+once pandas and matplotlib are loaded. Stages may nest. Times and memory
+include nested stages, minus the profiler's own overhead, while function
+profiles cover only the stage's own work (nested stages get their own).
+cProfile runs only on the main thread; stages in worker threads get timing
+and memory only. Repeated calls are aggregated per stage name into one JSON
+report.
+"""
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+DEFAULT_REPORT = 'reya_profile.json'
+TOP_ENTRIES = 15
+
+_active = None
+_IGNORED_TRACES = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+def _is_profiler_frame(function):
+    """Stage wrappers and their contextlib plumbing, not pipeline code"""
+    filename, _, name = function
+    return (filename in (__file__, contextlib.__file__) or
+            name == '<built-in method builtins.next>')
+
+
+class _StageStats:
+    """Aggregate of every call of one stage"""
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak = 0
+        self.allocated = 0
+        self.stats = None
+        self.allocations = {}  # 'file:line' -> net bytes
+
+    def add_profile(self, profile):
+        if self.stats is None:
+            self.stats = pstats.Stats(profile)
+        else:
+            self.stats.add(profile)
+
+    def top_functions(self, limit):
+        if self.stats is None:
+            return []
+        rows = sorted(
+            (item for item in self.stats.stats.items() if not _is_profiler_frame(item[0])),
+            key=lambda item: item[1][3], reverse=True
+        )
+        return [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({name})",
+                'calls': calls,
+                'tottime_s': round(tottime, 6),
+                'cumtime_s': round(cumtime, 6)
+            }
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:limit]
+        ]
+
+    def to_dict(self, limit):
+        top_allocations = sorted(self.allocations.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'calls': self.calls,
+            'wall_s': round(self.wall, 6),
+            'cpu_s': round(self.cpu, 6),
+            'peak_bytes': self.peak,
+            'net_allocated_bytes': self.allocated,
+            'top_functions': self.top_functions(limit),
+            'top_allocations': [
+                {'line': line, 'bytes': size} for line, size in top_allocations[:limit] if size > 0
+            ]
+        }
+
+
+class StageProfiler:
+    """Collects timing, cProfile and tracemalloc data per named stage"""
+
+    def __init__(self, output=DEFAULT_REPORT, cprofile=True, memory=True,
+                 allocation_sites=False, top=TOP_ENTRIES):
+        self.output = output
+        self.cprofile = cprofile
+        self.memory = memory
+        self.allocation_sites = memory and allocation_sites
+        self.top = top
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if parent is not None and parent['profile'] is not None:
+            parent['profile'].disable()
+        setup_wall = time.perf_counter()
+        setup_cpu = time.process_time()
+        frame = {'profile': None, 'peak': 0, 'overhead_wall': 0.0, 'overhead_cpu': 0.0}
+        on_main = threading.current_thread() is threading.main_thread()
+
+        if self.cprofile and on_main:
+            frame['profile'] = cProfile.Profile()
+        before = None
+        if self.memory:
+            if parent is not None:
+                parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+            # Snapshot first so its own allocation does not count as the stage's peak
+            if self.allocation_sites:
+                before = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        stack.append(frame)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if frame['profile'] is not None:
+            frame['profile'].enable()
+        try:
+            yield
+        finally:
+            if frame['profile'] is not None:
+                frame['profile'].disable()
+            wall = time.perf_counter() - wall - frame['overhead_wall']
+            cpu = time.process_time() - cpu - frame['overhead_cpu']
+            stack.pop()
+
+            peak = allocated = 0
+            allocations = []
+            if self.memory:
+                current, traced_peak = tracemalloc.get_traced_memory()
+                peak = max(frame['peak'], traced_peak) - start_memory
+                allocated = current - start_memory
+                if parent is not None:
+                    parent['peak'] = max(parent['peak'], frame['peak'], traced_peak)
+                if before is not None:
+                    after = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+                    allocations = after.compare_to(before, 'lineno')[:self.top]
+                    del before, after
+            with self._lock:
+                stats = self.stages.setdefault(name, _StageStats())
+                stats.calls += 1
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.peak = max(stats.peak, peak)
+                stats.allocated += allocated
+                if frame['profile'] is not None:
+                    stats.add_profile(frame['profile'])
+                for diff in allocations:
+                    frame_info = diff.traceback[0]
+                    line = f"{os.path.basename(frame_info.filename)}:{frame_info.lineno}"
+                    stats.allocations[line] = stats.allocations.get(line, 0) + diff.size_diff
+            if self.memory:
+                # Keep snapshots and collected stats out of the parent's peak
+                tracemalloc.reset_peak()
+            if parent is not None:
+                # Everything but the stage body is profiler overhead for the parent
+                parent['overhead_wall'] += time.perf_counter() - setup_wall - wall
+                parent['overhead_cpu'] += time.process_time() - setup_cpu - cpu
+                if parent['profile'] is not None:
+                    parent['profile'].enable()
+
+    def report(self):
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'command': ' '.join(sys.argv),
+            'total_wall_s': round(time.perf_counter() - self.started, 6),
+            'cprofile': self.cprofile,
+            'memory': self.memory,
+            'allocation_sites': self.allocation_sites,
+            'stages': {name: stats.to_dict(self.top) for name, stats in self.stages.items()}
+        }
+
+    def write(self, path=None):
+        path = path or self.output
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+    def print_summary(self):
+        print(f"\n⏱️  Stage profile ({len(self.stages)} stages):")
+        print(f"   {'stage':40} {'calls':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}")
+        for name, stats in self.stages.items():
+            print(f"   {name:40} {stats.calls:5} {stats.wall:9.3f} {stats.cpu:9.3f} "
+                  f"{stats.peak / 1024 ** 2:9.1f}")
+
+
+def enable_profiling(output=None, **kwargs):
+    """Start collecting stage profiles for this process; returns the profiler"""
+    global _active
+    _active = StageProfiler(output or DEFAULT_REPORT, **kwargs)
+    return _active
+
+
+def profiling_from_env(output=None):
+    """
+    Enable profiling if ``output`` is given (e.g. from ``--profile``) or
+    ``REYA_PROFILE`` is set; returns the profiler or None.
+    """
+    if output is None:
+        value = os.environ.get('REYA_PROFILE', '')
+        if value.lower() in ('', '0', 'false', 'no'):
+            return None
+        output = DEFAULT_REPORT if value.lower() in ('1', 'true', 'yes') else value
+    allocation_sites = os.environ.get('REYA_PROFILE_ALLOCATIONS', '').lower() in ('1', 'true', 'yes')
+    return enable_profiling(output, allocation_sites=allocation_sites)
+
+
+def finish_profiling():
+    """Write the report of the active profiler and print a summary"""
+    global _active
+    if _active is None:
+        return None
+    profiler, _active = _active, None
+    report = profiler.write()
+    profiler.print_summary()
+    print(f"✅ Stage profile written to {profiler.output}")
+    return report
+
+
+def stage(name):
+    """Context manager timing ``name`` when profiling is enabled"""
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def profiled(name):
+    """Decorator marking a function as pipeline stage ``name``"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
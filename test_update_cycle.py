@@ -10,6 +10,9 @@ import os
 import json
 from datetime import datetime
 
+from leaderboard_io import scan_header
+from snapshot_validator import print_report, validate_snapshot
+
 def run_command(cmd, description):
     """Run a command and return success status"""
     print(f"\n🔄 {description}")
@@ -41,14 +44,23 @@ def check_json_file():
         return False
     
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Only the header is parsed; the leaderboard array is never decoded
+        required_keys = ['timestamp', 'source', 'totalEntries']
+        data, has_leaderboard = scan_header(json_file, keys=required_keys)
         
-        required_keys = ['timestamp', 'source', 'totalEntries', 'leaderboard']
         for key in required_keys:
             if key not in data:
                 print(f"❌ Missing required key: {key}")
                 return False
+        if not has_leaderboard:
+            print("❌ Missing required key: leaderboard")
+            return False
+        
+        # Bulk invariant checks over every row
+        report = validate_snapshot(json_file)
+        print_report(report)
+        if not report['ok']:
+            return False
         
         print(f"✅ {json_file} is valid")
         print(f"   - Total entries: {data['totalEntries']}")
@@ -71,9 +83,9 @@ def main():
     
     # Test 1: Check if Python dependencies are available
     print("\n📋 Test 1: Check Python Dependencies")
-    if not run_command("python -c \"import requests, json, time; print('All dependencies available')\"", 
+    if not run_command("python -c \"import requests, json, time, numpy; print('All dependencies available')\"", 
                       "Checking Python dependencies"):
-        print("💡 Install missing dependencies with: pip install requests")
+        print("💡 Install missing dependencies with: pip install requests numpy")
         return False
     
     # Test 2: Test the fetch script